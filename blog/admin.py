@@ -1,6 +1,80 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
 from .models import Post
 from .models import Comment
+from .mixins import IndexedSearchMixin
+from .moderation import DELETE, UNPUBLISH, PUBLISH, moderate_posts
+from .paginators import EstimatedCountPaginator
 
-admin.site.register(Post)
-admin.site.register(Comment)
+DELETE_PREVIEW = 20
+
+
+class PostAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('title', 'author', 'date_posted', 'is_published')
+    list_select_related = ('author',)
+    list_filter = ('is_published', 'date_posted')
+    search_fields = ('^title', '=author__username')
+    raw_id_fields = ('author', 'likes')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['delete_posts', 'unpublish_posts', 'publish_posts']
+
+    def get_actions(self, request):
+        # The default action deletes one post at a time with all its signals.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def _moderate(self, request, queryset, action, done):
+        handled = moderate_posts(queryset, action)
+        self.message_user(request, f'{handled} posts {done}.', messages.SUCCESS)
+
+    @admin.action(description='Delete selected posts', permissions=['delete'])
+    def delete_posts(self, request, queryset):
+        # Like delete_selected, ask first; the confirmation page posts back with post=yes.
+        if request.POST.get('post'):
+            self._moderate(request, queryset, DELETE, 'deleted')
+            return None
+
+        count = queryset.count()
+        preview = list(queryset.order_by('pk').values_list('title', flat=True)[:DELETE_PREVIEW])
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Are you sure?',
+            'opts': self.model._meta,
+            'count': count,
+            'preview': preview,
+            'remaining': count - len(preview),
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across') == '1',
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        request.current_app = self.admin_site.name
+        return TemplateResponse(request, 'admin/blog/post/delete_posts_confirmation.html', context)
+
+    @admin.action(description='Unpublish selected posts', permissions=['change'])
+    def unpublish_posts(self, request, queryset):
+        self._moderate(request, queryset, UNPUBLISH, 'unpublished')
+
+    @admin.action(description='Publish selected posts', permissions=['change'])
+    def publish_posts(self, request, queryset):
+        self._moderate(request, queryset, PUBLISH, 'published')
+
+
+class CommentAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('name', 'post', 'date_added')
+    list_select_related = ('post',)
+    list_filter = ('date_added',)
+    search_fields = ('^name',)
+    raw_id_fields = ('post',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Only the post's title is shown; don't load its content for every comment.
+        return super().get_queryset(request).select_related('post').defer('post__content')
+
+
+admin.site.register(Post, PostAdmin)
+admin.site.register(Comment, CommentAdmin)
@@ -0,0 +1,280 @@
+"""Read-only JSON API, version 1.
+
+Rows are serialized straight from ``values()`` queries. Every list supports
+``?fields=`` to pick the returned fields, ``?limit=`` and an opaque
+``?cursor=`` taken from the previous page's ``next`` value. Posts and authors
+can be fetched in batches with ``?ids=`` and ``?usernames=``. Responses carry
+an ETag and answer ``If-None-Match`` with 304.
+"""
+import base64
+import hashlib
+import json
+
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Func, IntegerField, OuterRef, Q, Subquery
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.views import View
+from users.models import Profile
+from .models import Post, Comment
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_BATCH = 100
+
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'content': 'content',
+    'date_posted': 'date_posted',
+    'author': 'author__username',
+    'likes': 'like_count',
+    'comments': 'comment_count',
+}
+POST_DEFAULT_FIELDS = ('id', 'title', 'date_posted', 'author')
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'name': 'name',
+    'body': 'body',
+    'date_added': 'date_added',
+}
+COMMENT_DEFAULT_FIELDS = tuple(COMMENT_FIELDS)
+
+AUTHOR_FIELDS = {
+    'username': 'username',
+    'image': 'profile__image',
+    'posts': 'post_count',
+}
+AUTHOR_DEFAULT_FIELDS = tuple(AUTHOR_FIELDS)
+
+
+class ApiError(Exception):
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def api_response(request, data):
+    body = json.dumps(data, cls=DjangoJSONEncoder)
+    etag = f'"{hashlib.md5(body.encode()).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response.headers['ETag'] = etag
+    return response
+
+
+def parse_fields(request, available, default):
+    if 'fields' not in request.GET:
+        return list(default)
+    fields = [field for field in request.GET['fields'].split(',') if field]
+    unknown = set(fields) - set(available)
+    if unknown:
+        raise ApiError(f'Unknown fields: {", ".join(sorted(unknown))}. Available: {", ".join(available)}.')
+    return fields or list(default)
+
+
+def parse_limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError('limit must be an integer.')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def parse_list(request, name, convert=str):
+    if name not in request.GET:
+        return None
+    try:
+        values = [convert(value) for value in request.GET[name].split(',') if value]
+    except ValueError:
+        raise ApiError(f'{name} must be a comma separated list.')
+    if len(values) > MAX_BATCH:
+        raise ApiError(f'At most {MAX_BATCH} {name} can be fetched at once.')
+    return values
+
+
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode('|'.join(map(str, values)).encode()).decode()
+
+
+def decode_cursor(request):
+    cursor = request.GET.get('cursor')
+    if not cursor:
+        return None
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError('Invalid cursor.')
+
+
+def select(queryset, fields, mapping):
+    """
+    Return ``fields`` of every row as dicts keyed by the API field names.
+    """
+    columns = [mapping[field] for field in fields]
+    return [dict(zip(fields, row)) for row in queryset.values_list(*columns)]
+
+
+def count_of(related):
+    """
+    A correlated ``(SELECT COUNT(*) ...)`` over ``related``, which is filtered
+    on an ``OuterRef``. Unlike ``Count()`` it needs no join or GROUP BY on the
+    outer query, so it is only evaluated for the rows that are returned.
+    """
+    count = related.order_by().annotate(count=Func(F('pk'), function='COUNT')).values('count')
+    return Subquery(count, output_field=IntegerField())
+
+
+def posts_queryset(fields):
+    posts = Post.objects.filter(is_published=True)
+    if 'likes' in fields:
+        posts = posts.annotate(like_count=count_of(Post.likes.through.objects.filter(post_id=OuterRef('pk'))))
+    if 'comments' in fields:
+        posts = posts.annotate(comment_count=count_of(Comment.objects.filter(post_id=OuterRef('pk'))))
+    return posts
+
+
+class ApiView(View):
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=error.status)
+
+
+class PostListApiView(ApiView):
+    """
+    Newest posts first. ``?ids=1,2,3`` fetches those posts in one request and
+    ``?author=<username>`` limits the list to one author.
+    """
+
+    def get(self, request):
+        fields = parse_fields(request, POST_FIELDS, POST_DEFAULT_FIELDS)
+        posts = posts_queryset(fields)
+
+        ids = parse_list(request, 'ids', int)
+        if ids is not None:
+            return api_response(request, {'results': select(posts.filter(pk__in=ids).order_by('pk'), fields, POST_FIELDS)})
+
+        if 'author' in request.GET:
+            posts = posts.filter(author__username=request.GET['author'])
+
+        cursor = decode_cursor(request)
+        if cursor is not None:
+            try:
+                date_posted, pk = parse_datetime(cursor[0]), int(cursor[1])
+            except (IndexError, ValueError):
+                raise ApiError('Invalid cursor.')
+            if date_posted is None:
+                raise ApiError('Invalid cursor.')
+            posts = posts.filter(Q(date_posted__lt=date_posted) | Q(date_posted=date_posted, pk__lt=pk))
+
+        limit = parse_limit(request)
+        # The cursor columns are fetched along with the requested fields.
+        rows = list(posts.order_by('-date_posted', '-pk').values_list(
+            'date_posted', 'pk', *[POST_FIELDS[field] for field in fields]
+        )[:limit + 1])
+        next_cursor = encode_cursor(rows[limit - 1][0].isoformat(), rows[limit - 1][1]) if len(rows) > limit else None
+        results = [dict(zip(fields, row[2:])) for row in rows[:limit]]
+        return api_response(request, {'results': results, 'next': next_cursor})
+
+
+class PostDetailApiView(ApiView):
+
+    def get(self, request, pk):
+        fields = parse_fields(request, POST_FIELDS, POST_FIELDS)
+        results = select(posts_queryset(fields).filter(pk=pk), fields, POST_FIELDS)
+        if not results:
+            raise ApiError('Post not found.', status=404)
+        return api_response(request, results[0])
+
+
+class IdCursorListApiView(ApiView):
+    """
+    A list ordered by primary key, paginated with the last id as cursor.
+    """
+
+    def page(self, request, queryset, columns):
+        cursor = decode_cursor(request)
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(pk__gt=int(cursor[0]))
+            except ValueError:
+                raise ApiError('Invalid cursor.')
+        limit = parse_limit(request)
+        rows = list(queryset.order_by('pk').values_list('pk', *columns)[:limit + 1])
+        next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def published_post(self, pk):
+        if not Post.objects.filter(pk=pk, is_published=True).exists():
+            raise ApiError('Post not found.', status=404)
+
+
+class CommentListApiView(IdCursorListApiView):
+
+    def get(self, request, pk):
+        self.published_post(pk)
+        fields = parse_fields(request, COMMENT_FIELDS, COMMENT_DEFAULT_FIELDS)
+        rows, next_cursor = self.page(request, Comment.objects.filter(post_id=pk),
+                                      [COMMENT_FIELDS[field] for field in fields])
+        results = [dict(zip(fields, row[1:])) for row in rows]
+        return api_response(request, {'results': results, 'next': next_cursor})
+
+
+class LikeListApiView(IdCursorListApiView):
+
+    def get(self, request, pk):
+        self.published_post(pk)
+        rows, next_cursor = self.page(request, Post.likes.through.objects.filter(post_id=pk), ['user__username'])
+        return api_response(request, {
+            'count': Post.likes.through.objects.filter(post_id=pk).count(),
+            'results': [username for _, username in rows],
+            'next': next_cursor,
+        })
+
+
+def authors_queryset(fields):
+    authors = User.objects.all()
+    if 'posts' in fields:
+        authors = authors.annotate(post_count=count_of(Post.objects.filter(author_id=OuterRef('pk'), is_published=True)))
+    return authors
+
+
+def with_image_urls(authors):
+    storage = Profile._meta.get_field('image').storage
+    for author in authors:
+        if author.get('image'):
+            author['image'] = storage.url(author['image'])
+    return authors
+
+
+class AuthorListApiView(ApiView):
+    """
+    Author profiles for ``?usernames=a,b,c``.
+    """
+
+    def get(self, request):
+        fields = parse_fields(request, AUTHOR_FIELDS, AUTHOR_DEFAULT_FIELDS)
+        usernames = parse_list(request, 'usernames')
+        if not usernames:
+            raise ApiError('usernames is required.')
+        authors = select(authors_queryset(fields).filter(username__in=usernames), fields, AUTHOR_FIELDS)
+        return api_response(request, {'results': with_image_urls(authors)})
+
+
+class AuthorDetailApiView(ApiView):
+
+    def get(self, request, username):
+        fields = parse_fields(request, AUTHOR_FIELDS, AUTHOR_DEFAULT_FIELDS)
+        authors = select(authors_queryset(fields).filter(username=username), fields, AUTHOR_FIELDS)
+        if not authors:
+            raise ApiError('Author not found.', status=404)
+        return api_response(request, with_image_urls(authors)[0])
@@ -0,0 +1,166 @@
+"""RSS, Atom and JSON feeds for the whole blog and for a single author.
+
+Feeds are built from a slim ``values()`` query and the generated bytes are
+cached until the next ``Post`` is saved or deleted (see ``blog.signals``), or
+for at most ``FEED_CACHE_TIMEOUT`` seconds so that workers which don't share
+the cache pick up changes made elsewhere.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib.auth.models import User
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from django.views import View
+from .models import Post
+
+FEED_LENGTH = 20
+FEED_CACHE_TIMEOUT = 5 * 60
+POSTS_CHANGED_KEY = 'blog:posts-changed'
+
+
+def touch_posts():
+    """
+    Mark every feed as stale. Called from the ``Post`` signals.
+    """
+    cache.set(POSTS_CHANGED_KEY, timezone.now(), None)
+
+
+def posts_changed_at():
+    changed = cache.get(POSTS_CHANGED_KEY)
+    if changed is None:
+        cache.add(POSTS_CHANGED_KEY, timezone.now(), None)
+        changed = cache.get(POSTS_CHANGED_KEY)
+    return changed
+
+
+def feed_items(username=None):
+    posts = Post.objects.filter(is_published=True).order_by('-date_posted')
+    if username is not None:
+        posts = posts.filter(author__username=username)
+    return list(posts.values('id', 'title', 'content', 'date_posted', 'author__username')[:FEED_LENGTH])
+
+
+def newest_post_date(username=None):
+    posts = Post.objects.filter(is_published=True)
+    if username is not None:
+        posts = posts.filter(author__username=username)
+    return posts.aggregate(newest=Max('date_posted'))['newest']
+
+
+def cached_feed(view):
+    """
+    Serve ``view`` with conditional GET support and keep its body cached
+    until the posts change.
+
+    The ETag is a hash of the body and Last-Modified the newest post in it,
+    so a regenerated but unchanged feed still answers pollers with a 304.
+    Bodies are cached per scheme, host and path (the feed holds absolute
+    links) and expire after ``FEED_CACHE_TIMEOUT``.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = f'blog:feed:{request.scheme}:{request.get_host()}:{request.path}:{posts_changed_at().timestamp()}'
+        cached = cache.get(key)
+        if cached is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            newest = newest_post_date(kwargs.get('username'))
+            etag = f'"{hashlib.md5(response.content).hexdigest()}"'
+            cached = (response.content, response['Content-Type'], etag, newest)
+            cache.set(key, cached, FEED_CACHE_TIMEOUT)
+
+        content, content_type, etag, last_modified = cached
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified and int(last_modified.timestamp())
+        )
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        response.headers['ETag'] = etag
+        if last_modified:
+            response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+    return wrapper
+
+
+class LatestPostsFeed(Feed):
+    description = 'Latest posts on Django Blog.'
+
+    def get_object(self, request, username=None):
+        if username is not None:
+            # Raises User.DoesNotExist, which Feed turns into a 404.
+            User.objects.values_list('pk', flat=True).get(username=username)
+        return username
+
+    def title(self, username):
+        if username is None:
+            return 'Django Blog'
+        return f'Django Blog - Posts by {username}'
+
+    def link(self, username):
+        if username is None:
+            return reverse('blog-home')
+        return reverse('user_posts', args=[username])
+
+    def items(self, username):
+        return feed_items(username)
+
+    def item_title(self, item):
+        return item['title']
+
+    def item_description(self, item):
+        return item['content']
+
+    def item_link(self, item):
+        return reverse('post-detail', kwargs={'pk': item['id']})
+
+    def item_pubdate(self, item):
+        return item['date_posted']
+
+    def item_author_name(self, item):
+        return item['author__username']
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class LatestPostsJsonFeed(View):
+    """
+    The same feed in JSON Feed 1.1 format (https://jsonfeed.org/version/1.1).
+    """
+    feed = LatestPostsFeed()
+
+    def get(self, request, username=None):
+        try:
+            username = self.feed.get_object(request, username)
+        except User.DoesNotExist:
+            return JsonResponse({'error': 'Feed object does not exist.'}, status=404)
+
+        data = {
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': self.feed.title(username),
+            'home_page_url': request.build_absolute_uri(self.feed.link(username)),
+            'feed_url': request.build_absolute_uri(request.path),
+            'items': [
+                {
+                    'id': str(item['id']),
+                    'url': request.build_absolute_uri(self.feed.item_link(item)),
+                    'title': item['title'],
+                    'content_html': item['content'],
+                    'date_published': item['date_posted'].isoformat(),
+                    'authors': [{'name': item['author__username']}],
+                }
+                for item in feed_items(username)
+            ],
+        }
+        return JsonResponse(data, content_type='application/feed+json')
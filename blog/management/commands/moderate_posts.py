@@ -0,0 +1,49 @@
+from argparse import ArgumentTypeError
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime, parse_date
+from django.utils import timezone
+from datetime import datetime
+from blog.moderation import ACTIONS, DEFAULT_BATCH_SIZE, select_posts, moderate_posts
+
+PAST_TENSE = {'delete': 'deleted', 'unpublish': 'unpublished', 'publish': 'published'}
+
+
+def parse_moment(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ArgumentTypeError(f'{value!r} is not a valid date or datetime.')
+        moment = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = 'Delete, unpublish or publish posts in bulk by author, date range or keyword.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=ACTIONS)
+        parser.add_argument('--author', help='Username of the author.')
+        parser.add_argument('--since', type=parse_moment, help='Posts from this date on (inclusive).')
+        parser.add_argument('--until', type=parse_moment, help='Posts before this date (exclusive).')
+        parser.add_argument('--keyword', help='Text contained in the title or content.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the matching posts.')
+
+    def handle(self, *args, **options):
+        filters = {name: options[name] for name in ('author', 'since', 'until', 'keyword')}
+        if not any(value is not None for value in filters.values()):
+            raise CommandError('Give at least one of --author, --since, --until or --keyword.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        posts = select_posts(**filters)
+        if options['dry_run']:
+            self.stdout.write(f'{posts.count()} posts would be {PAST_TENSE[options["action"]]}.')
+            return
+
+        handled = moderate_posts(posts, options['action'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{handled} posts {PAST_TENSE[options["action"]]}.'))
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.6 on 2026-10-19 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_alter_post_likes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='is_published',
+            field=models.BooleanField(db_index=True, default=True),
+        ),
+    ]
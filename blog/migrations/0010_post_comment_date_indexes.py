@@ -0,0 +1,24 @@
+# Generated by Django 4.0.6 on 2026-10-19 12:21
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_is_published'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='date_added',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='date_posted',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
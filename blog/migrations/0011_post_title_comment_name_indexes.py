@@ -0,0 +1,23 @@
+# Generated by Django 4.0.6 on 2026-10-19 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_comment_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='name',
+            field=models.CharField(db_index=True, max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='title',
+            field=models.CharField(db_index=True, max_length=150),
+        ),
+    ]
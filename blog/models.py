@@ -6,11 +6,12 @@ from ckeditor.fields import RichTextField
 
 
 class Post(models.Model):
-    title = models.CharField(max_length=150)
+    title = models.CharField(max_length=150, db_index=True)
     content = RichTextField(blank=True)
-    date_posted = models.DateTimeField(default=timezone.now)
+    date_posted = models.DateTimeField(default=timezone.now, db_index=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     likes = models.ManyToManyField(User, related_name='blog_post_likes')
+    is_published = models.BooleanField(default=True, db_index=True)
 
     def __str__(self):
         return self.title
@@ -21,9 +22,9 @@ class Post(models.Model):
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, related_name="comments", on_delete=models.CASCADE)
-    name = models.CharField(max_length=150)
+    name = models.CharField(max_length=150, db_index=True)
     body = models.TextField()
-    date_added = models.DateTimeField(auto_now_add=True)
+    date_added = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return self.post.title + "-" + self.name
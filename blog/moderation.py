@@ -0,0 +1,75 @@
+"""Bulk moderation of posts, used by the admin actions and ``manage.py moderate_posts``.
+
+Posts are processed in primary-key ordered batches. Each batch is one short
+transaction that works on whole sets of rows (comments, likes, posts) instead
+of loading and deleting every object. Deletes still go through
+``QuerySet.delete()``, so every ``on_delete`` rule and signal is honoured.
+"""
+from django.db import transaction
+from django.db.models import Q
+from .feeds import touch_posts
+from .models import Post
+from .sitemaps import touch_sitemaps
+
+DELETE = 'delete'
+UNPUBLISH = 'unpublish'
+PUBLISH = 'publish'
+ACTIONS = (DELETE, UNPUBLISH, PUBLISH)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def select_posts(author=None, since=None, until=None, keyword=None):
+    """
+    Return the posts matching every given filter.
+    """
+    posts = Post.objects.all()
+    if author is not None:
+        posts = posts.filter(author__username=author)
+    if since is not None:
+        posts = posts.filter(date_posted__gte=since)
+    if until is not None:
+        posts = posts.filter(date_posted__lt=until)
+    if keyword is not None:
+        posts = posts.filter(Q(title__icontains=keyword) | Q(content__icontains=keyword))
+    return posts
+
+
+def _delete_batch(post_ids):
+    # Nothing listens for the deletion of comments or likes, so the collector
+    # removes them with one DELETE each. author_id is loaded for the Post
+    # post_delete receiver, which reads it after the row is gone.
+    Post.objects.filter(pk__in=post_ids).only('pk', 'author_id').delete()
+
+
+def moderate_posts(posts, action, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Apply ``action`` to every post in ``posts`` in batches of ``batch_size``
+    and return the number of posts handled.
+    """
+    if action not in ACTIONS:
+        raise ValueError(f'Unknown moderation action {action!r}.')
+
+    handled = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            posts.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'author_id')[:batch_size]
+        )
+        if not batch:
+            break
+        post_ids = [pk for pk, _ in batch]
+        last_pk = post_ids[-1]
+
+        with transaction.atomic():
+            if action == DELETE:
+                _delete_batch(post_ids)
+            else:
+                Post.objects.filter(pk__in=post_ids).update(is_published=action == PUBLISH)
+
+        touch_sitemaps(post_ids, {author_id for _, author_id in batch})
+        handled += len(batch)
+
+    if handled:
+        touch_posts()
+    return handled
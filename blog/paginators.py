@@ -0,0 +1,32 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 100000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the row count of an unfiltered queryset from the
+    planner statistics on PostgreSQL instead of running ``COUNT(*)``.
+    Small tables, filtered querysets and other databases are counted exactly.
+    """
+
+    def estimated_count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query') or queryset.query.where:
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        return int(row[0]) if row else None
+
+    @cached_property
+    def count(self):
+        estimate = self.estimated_count()
+        if estimate is not None and estimate > ESTIMATE_THRESHOLD:
+            return estimate
+        return super().count
@@ -0,0 +1,77 @@
+"""Publish/subscribe used to push live updates to WebSocket clients.
+
+The backend is chosen with the ``BLOG_PUBSUB_BACKEND`` setting (a dotted path)
+and has to provide ``subscribe(channel)``, ``unsubscribe(channel, queue)`` and
+``publish(channel, message)``. The default ``InMemoryBroker`` only reaches
+clients connected to the same process; a backend built on a shared message
+bus can replace it when the site runs more than one process.
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = 'blog.pubsub.InMemoryBroker'
+
+
+class InMemoryBroker:
+    """
+    Keep one bounded ``asyncio.Queue`` per subscriber. ``publish`` may be
+    called from any thread (e.g. a sync view or signal) and hands messages to
+    the subscriber's event loop. A subscriber that falls ``queue_size``
+    messages behind loses the oldest ones instead of slowing everyone down.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        queue = asyncio.Queue(self.queue_size)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(channel, {})[queue] = loop
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(channel, {})
+            subscribers.pop(queue, None)
+            if not subscribers:
+                self._subscribers.pop(channel, None)
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, {}).items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, message)
+            except RuntimeError:
+                # The subscriber's loop is closed; it unsubscribes on its way out.
+                pass
+
+    @staticmethod
+    def _put(queue, message):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+
+broker = SimpleLazyObject(
+    lambda: import_string(getattr(settings, 'BLOG_PUBSUB_BACKEND', DEFAULT_BACKEND))()
+)
+
+
+def publish(channel, message):
+    broker.publish(channel, message)
+
+
+def post_channel(post_id):
+    return f'post.{post_id}'
+
+
+def club_channel(name):
+    return f'club.{name}'
@@ -0,0 +1,109 @@
+"""ASGI WebSocket endpoint for live post updates and chat.
+
+Clients connect to ``/ws/post/<id>/`` or ``/ws/club/<name>/`` and receive
+JSON messages published on that channel (new comments, like counts and chat
+messages). Logged in users can send ``{"message": "..."}`` to chat on the
+channel. Every connection is a single coroutine waiting on its socket and
+its queue, so idle clients cost no threads.
+"""
+import asyncio
+import json
+import re
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.utils import timezone
+from .models import Post
+from .pubsub import broker, post_channel, club_channel
+
+CHAT_MESSAGE_MAX_LENGTH = 1000
+
+ROUTES = (
+    (re.compile(r'^/ws/post/(?P<pk>\d+)/$'), 'post'),
+    (re.compile(r'^/ws/club/(?P<name>[\w-]{1,50})/$'), 'club'),
+)
+
+
+def _headers(scope):
+    return {name.decode('latin1'): value.decode('latin1') for name, value in scope.get('headers', [])}
+
+
+def _load_user(headers):
+    cookie = SimpleCookie(headers.get('cookie', ''))
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    engine = import_module(settings.SESSION_ENGINE)
+    request = SimpleNamespace(session=engine.SessionStore(morsel.value if morsel else None))
+    return get_user(request)
+
+
+def _resolve(path):
+    for pattern, kind in ROUTES:
+        match = pattern.match(path)
+        if match:
+            if kind == 'post':
+                pk = int(match['pk'])
+                if not Post.objects.filter(pk=pk, is_published=True).exists():
+                    return None
+                return post_channel(pk)
+            return club_channel(match['name'])
+    return None
+
+
+async def websocket_application(scope, receive, send):
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+
+    headers = _headers(scope)
+    origin = headers.get('origin')
+    if origin and urlsplit(origin).netloc != headers.get('host'):
+        await send({'type': 'websocket.close', 'code': 4003})
+        return
+
+    channel = await sync_to_async(_resolve)(scope['path'])
+    if channel is None:
+        await send({'type': 'websocket.close', 'code': 4004})
+        return
+    user = await sync_to_async(_load_user)(headers)
+
+    queue = broker.subscribe(channel)
+    await send({'type': 'websocket.accept'})
+    forward = asyncio.create_task(_forward(queue, send))
+    try:
+        await _listen(receive, channel, user)
+    finally:
+        forward.cancel()
+        broker.unsubscribe(channel, queue)
+        # Collect the task's outcome; a send to a dropped client may have failed.
+        await asyncio.gather(forward, return_exceptions=True)
+
+
+async def _forward(queue, send):
+    while True:
+        message = await queue.get()
+        await send({'type': 'websocket.send', 'text': json.dumps(message)})
+
+
+async def _listen(receive, channel, user):
+    while True:
+        event = await receive()
+        if event['type'] == 'websocket.disconnect':
+            return
+        if event['type'] != 'websocket.receive' or not user.is_authenticated:
+            continue
+        try:
+            text = json.loads(event.get('text') or '')['message']
+        except (ValueError, KeyError, TypeError):
+            continue
+        if isinstance(text, str) and text.strip():
+            broker.publish(channel, {
+                'type': 'chat',
+                'user': user.username,
+                'message': text.strip()[:CHAT_MESSAGE_MAX_LENGTH],
+                'date': timezone.now().isoformat(),
+            })
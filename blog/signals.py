@@ -0,0 +1,56 @@
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Post, Comment
+from .feeds import touch_posts
+from .pubsub import publish, post_channel
+from .sitemaps import touch_sitemaps
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, **kwargs):
+    touch_posts()
+    touch_sitemaps([instance.pk], [instance.author_id])
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    touch_posts()
+    touch_sitemaps([instance.pk], [instance.author_id])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    # Author sitemap entries link to the username; skip saves such as last_login updates.
+    if not created and (update_fields is None or 'username' in update_fields):
+        touch_sitemaps([], [instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    # Live updates go out only once the change is committed, so clients never
+    # see a comment or like count that is rolled back.
+    if created:
+        transaction.on_commit(partial(publish, post_channel(instance.post_id), {
+            'type': 'comment',
+            'name': instance.name,
+            'body': instance.body,
+            'date_added': instance.date_added.isoformat(),
+        }))
+
+
+@receiver(m2m_changed, sender=Post.likes.through)
+def likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    post_ids = list(pk_set or ()) if reverse else [instance.pk]
+    transaction.on_commit(partial(publish_like_counts, post_ids))
+
+
+def publish_like_counts(post_ids):
+    for post_id in post_ids:
+        count = Post.likes.through.objects.filter(post_id=post_id).count()
+        publish(post_channel(post_id), {'type': 'likes', 'count': count})
@@ -0,0 +1,153 @@
+"""Sitemaps for posts and author pages.
+
+Each sitemap page covers a fixed range of primary keys instead of an OFFSET
+window, so generating page N never scans the rows before it. Rendered pages
+are cached per chunk and only the chunk a changed post falls into is
+regenerated (see ``blog.signals``). Entries also expire after
+``SITEMAP_CACHE_TIMEOUT`` seconds for workers that don't share the cache.
+"""
+from django.contrib.auth.models import User
+from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps import views as sitemap_views
+from django.core.cache import cache
+from django.core.paginator import Page, EmptyPage, PageNotAnInteger
+from django.db.models import Exists, Max, OuterRef, Q
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .feeds import posts_changed_at
+from .models import Post
+
+SITEMAP_CHUNK_SIZE = 10000
+SITEMAP_CACHE_TIMEOUT = 60 * 60
+
+
+class IdRangePaginator:
+    """
+    Paginate ``queryset`` by ``per_page`` wide primary-key ranges. Page N
+    holds the rows with ``(N - 1) * per_page < pk <= N * per_page``.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    @cached_property
+    def num_pages(self):
+        max_pk = self.queryset.model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        return max(1, -(-max_pk // self.per_page))
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1 or number > self.num_pages:
+            raise EmptyPage('That page contains no results')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = self.queryset.filter(pk__gt=bottom, pk__lte=bottom + self.per_page).order_by('pk')
+        return Page(object_list, number, self)
+
+
+class IdRangeSitemap(Sitemap):
+    limit = SITEMAP_CHUNK_SIZE
+
+    @property
+    def paginator(self):
+        return IdRangePaginator(self.items(), self.limit)
+
+
+class PostSitemap(IdRangeSitemap):
+    changefreq = 'weekly'
+
+    def items(self):
+        return Post.objects.filter(is_published=True).only('id', 'date_posted')
+
+    def lastmod(self, post):
+        return post.date_posted
+
+
+class AuthorSitemap(IdRangeSitemap):
+    changefreq = 'daily'
+
+    def items(self):
+        return User.objects.filter(
+            Exists(Post.objects.filter(author=OuterRef('pk'), is_published=True))
+        ).annotate(
+            last_post=Max('post__date_posted', filter=Q(post__is_published=True))
+        ).only('id', 'username')
+
+    def location(self, user):
+        return reverse('user_posts', args=[user.username])
+
+    def lastmod(self, user):
+        return user.last_post
+
+
+sitemaps = {
+    'posts': PostSitemap,
+    'authors': AuthorSitemap,
+}
+
+
+def _chunk_key(section, page):
+    return f'blog:sitemap-chunk:{section}:{page}'
+
+
+def touch_sitemaps(post_ids, author_ids):
+    """
+    Mark the sitemap chunks holding the given posts and authors as stale.
+    """
+    now = timezone.now()
+    chunks = {_chunk_key('posts', -(-pk // SITEMAP_CHUNK_SIZE)) for pk in post_ids}
+    chunks |= {_chunk_key('authors', -(-pk // SITEMAP_CHUNK_SIZE)) for pk in author_ids}
+    cache.set_many(dict.fromkeys(chunks, now), SITEMAP_CACHE_TIMEOUT)
+
+
+def _chunk_changed_at(section, page):
+    key = _chunk_key(section, page)
+    changed = cache.get(key)
+    if changed is None:
+        cache.add(key, timezone.now(), SITEMAP_CACHE_TIMEOUT)
+        changed = cache.get(key)
+    return changed
+
+
+def _cached_response(key, view, request, **kwargs):
+    cached = cache.get(key)
+    if cached is None:
+        response = view(request, **kwargs)
+        response.render()
+        cached = (response.content, response['Content-Type'])
+        cache.set(key, cached, SITEMAP_CACHE_TIMEOUT)
+
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    response.headers['X-Robots-Tag'] = 'noindex, noodp, noarchive'
+    return response
+
+
+def sitemap_index(request):
+    key = f'blog:sitemap-index:{request.scheme}:{request.get_host()}:{posts_changed_at().timestamp()}'
+    return _cached_response(key, sitemap_views.index, request, sitemaps=sitemaps,
+                            sitemap_url_name='sitemap-section')
+
+
+def sitemap_section(request, section):
+    if section not in sitemaps:
+        raise Http404(f'No sitemap available for section: {section!r}')
+    # Validate the page before stamping it, so unknown pages don't leave cache entries behind.
+    try:
+        page = sitemaps[section]().paginator.validate_number(request.GET.get('p', 1))
+    except PageNotAnInteger:
+        raise Http404(f"No page {request.GET['p']!r}")
+    except EmptyPage:
+        raise Http404(f'Page {request.GET["p"]} empty')
+    changed = _chunk_changed_at(section, page)
+    key = f'blog:sitemap:{section}:{page}:{request.scheme}:{request.get_host()}:{changed.timestamp()}'
+    return _cached_response(key, sitemap_views.sitemap, request, sitemaps=sitemaps, section=section)
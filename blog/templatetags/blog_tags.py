@@ -0,0 +1,102 @@
+"""Lightweight rendering helpers for the blog templates.
+
+``{% cached_url %}`` memoizes ``reverse()`` results, and ``{% post_card %}``
+and ``{% pagination %}`` build their markup in Python instead of walking a
+template node tree for every post on the page.
+"""
+from functools import lru_cache
+
+from django import template
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template.defaultfilters import date
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+from django.utils.timezone import localtime
+
+register = template.Library()
+
+
+@lru_cache(maxsize=4096)
+def _reverse(viewname, args, script_prefix, urlconf):
+    return reverse(viewname, args=args, urlconf=urlconf)
+
+
+def cached_reverse(viewname, *args):
+    return _reverse(viewname, args, get_script_prefix(), get_urlconf())
+
+
+@receiver(setting_changed)
+def clear_url_cache(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _reverse.cache_clear()
+
+
+@register.simple_tag
+def cached_url(viewname, *args):
+    """
+    Same as ``{% url %}`` for positional arguments, but each URL is only
+    reversed once.
+    """
+    return cached_reverse(viewname, *args)
+
+
+def avatar_url(user):
+    """
+    URL of ``user``'s profile image, or an empty string like the template's
+    ``{{ user.profile.image.url }}`` gave for users without a profile.
+    """
+    # RelatedObjectDoesNotExist is an AttributeError, so getattr() covers a missing profile.
+    profile = getattr(user, 'profile', None)
+    if profile is None or not profile.image:
+        return ''
+    return profile.image.url
+
+
+@register.simple_tag
+def post_card(post, raw_content=False):
+    """
+    Render the summary card of ``post``. ``raw_content`` outputs the post
+    content as HTML instead of escaping it.
+    """
+    content = mark_safe(post.content) if raw_content else post.content
+    return format_html(
+        '<article class="media content-section">'
+        '<img class="rounded-circle article-img" src="{}">'
+        '<div class="media-body">'
+        '<div class="article-metadata">'
+        '<a class="mr-2" href="{}">{}</a>'
+        '<small class="text-muted">{}</small>'
+        '</div>'
+        '<h2><a class="article-title" href="{}">{}</a></h2>'
+        '<p class="article-content">{}</p>'
+        '</div>'
+        '</article>',
+        avatar_url(post.author),
+        cached_reverse('user_posts', post.author.username),
+        post.author.username,
+        # The template's {{ |date }} converted to the current time zone first.
+        date(localtime(post.date_posted), 'F d, Y'),
+        cached_reverse('post-detail', post.id),
+        post.title,
+        content,
+    )
+
+
+@register.simple_tag
+def pagination(page):
+    """
+    First/Previous/Next/Last buttons plus the page numbers next to ``page``.
+    """
+    links = []
+    if page.has_previous():
+        links += [(1, 'btn-outline-info', 'First'),
+                  (page.previous_page_number(), 'btn-outline-info', 'Previous')]
+    for number in range(max(1, page.number - 2), min(page.paginator.num_pages, page.number + 2) + 1):
+        links.append((number, 'btn-info' if number == page.number else 'btn-outline-info', number))
+    if page.has_next():
+        links += [(page.next_page_number(), 'btn-outline-info', 'Next'),
+                  (page.paginator.num_pages, 'btn-outline-info', 'Last')]
+    return format_html_join('\n', '<a class="btn {} mb-4" href="?page={}">{}</a>',
+                            ((css, number, label) for number, css, label in links))
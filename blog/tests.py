@@ -1,3 +1,651 @@
+import asyncio
+import datetime
+import json
+import re
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.template import Context, Template
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from .feeds import posts_changed_at
+from .models import Post, Comment
+from .moderation import DELETE, PUBLISH, UNPUBLISH, moderate_posts, select_posts
+from .paginators import EstimatedCountPaginator
+from .realtime import websocket_application
+from .sitemaps import IdRangeSitemap, _chunk_key
+from .templatetags.blog_tags import pagination, post_card
+
+
+class PostApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice')
+        cls.bob = User.objects.create_user('bob')
+        start = timezone.now() - datetime.timedelta(days=1)
+        cls.posts = [
+            Post.objects.create(title=f'Post {i}', content=f'Content {i}', author=cls.alice,
+                                date_posted=start + datetime.timedelta(minutes=i // 2))
+            for i in range(7)
+        ]
+        cls.hidden = Post.objects.create(title='Hidden', content='', author=cls.alice, is_published=False)
+        cls.posts[0].likes.add(cls.alice, cls.bob)
+        for name in ('one', 'two', 'three'):
+            Comment.objects.create(post=cls.posts[0], name=name, body='Nice')
+
+    def get(self, url, **extra):
+        response = self.client.get(url, **extra)
+        return response, response.json() if response.status_code != 304 else None
+
+    def test_cursor_walks_every_post_once_newest_first(self):
+        # Pairs of posts share date_posted, so the cursor has to break ties on pk.
+        ids, url = [], reverse('api-post-list') + '?limit=3&fields=id'
+        while True:
+            response, data = self.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [post['id'] for post in data['results']]
+            if data['next'] is None:
+                break
+            url = reverse('api-post-list') + f'?limit=3&fields=id&cursor={data["next"]}'
+
+        expected = sorted(self.posts, key=lambda post: (post.date_posted, post.pk), reverse=True)
+        self.assertEqual(ids, [post.pk for post in expected])
+
+    def test_invalid_cursor(self):
+        response, data = self.get(reverse('api-post-list') + '?cursor=nonsense')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data, {'error': 'Invalid cursor.'})
+
+    def test_fields(self):
+        _, data = self.get(reverse('api-post-list') + '?limit=1')
+        self.assertEqual(set(data['results'][0]), {'id', 'title', 'date_posted', 'author'})
+
+        _, data = self.get(reverse('api-post-detail', args=[self.posts[0].pk]) + '?fields=title,likes,comments')
+        self.assertEqual(data, {'title': 'Post 0', 'likes': 2, 'comments': 3})
+
+        response, data = self.get(reverse('api-post-list') + '?fields=title,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', data['error'])
+
+    def test_counts_do_not_group_the_post_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            _, data = self.get(reverse('api-post-list') + '?fields=id,likes,comments&limit=100')
+        self.assertNotIn('GROUP BY', queries.captured_queries[0]['sql'])
+        counts = {post['id']: (post['likes'], post['comments']) for post in data['results']}
+        self.assertEqual(counts[self.posts[0].pk], (2, 3))
+        self.assertEqual(counts[self.posts[1].pk], (0, 0))
+
+    def test_ids_fetch_a_batch_of_published_posts(self):
+        wanted = [self.posts[3].pk, self.posts[1].pk, self.hidden.pk]
+        _, data = self.get(reverse('api-post-list') + f'?ids={",".join(map(str, wanted))}&fields=id')
+        self.assertEqual(data['results'], [{'id': self.posts[1].pk}, {'id': self.posts[3].pk}])
+
+        response, _ = self.get(reverse('api-post-list') + '?ids=1,x')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unpublished_post_is_not_found(self):
+        response, _ = self.get(reverse('api-post-detail', args=[self.hidden.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_etag(self):
+        url = reverse('api-post-detail', args=[self.posts[0].pk])
+        response, _ = self.get(url)
+        etag = response.headers['ETag']
+
+        response, _ = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        Post.objects.filter(pk=self.posts[0].pk).update(title='Changed')
+        response, data = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(data['title'], 'Changed')
+
+    def test_authors(self):
+        _, data = self.get(reverse('api-author-list') + '?usernames=alice,bob,nobody&fields=username,posts')
+        self.assertEqual(sorted(data['results'], key=lambda author: author['username']),
+                         [{'username': 'alice', 'posts': 7}, {'username': 'bob', 'posts': 0}])
+
+        response, _ = self.get(reverse('api-author-detail', args=['nobody']))
+        self.assertEqual(response.status_code, 404)
+
+
+class FeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice')
+        cls.post = Post.objects.create(title='Visible', content='Hello', author=cls.alice)
+        Post.objects.create(title='Draft', content='Secret', author=cls.alice, is_published=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeat_request_is_not_modified(self):
+        url = reverse('blog-feed-rss')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_unchanged_feed_keeps_its_etag_when_regenerated(self):
+        url = reverse('blog-feed-atom')
+        first = self.client.get(url)
+        cache.clear()
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.headers['Last-Modified'], first.headers['Last-Modified'])
+
+    def test_saving_a_post_changes_the_etag(self):
+        url = reverse('blog-feed-json')
+        etag = self.client.get(url).headers['ETag']
+        self.post.title = 'Renamed'
+        self.post.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.json()['items'][0]['title'], 'Renamed')
+
+    def test_unpublished_posts_are_hidden(self):
+        for name in ('blog-feed-rss', 'blog-feed-atom', 'blog-feed-json'):
+            content = self.client.get(reverse(name)).content
+            self.assertIn(b'Visible', content)
+            self.assertNotIn(b'Draft', content)
+
+    def test_author_feed(self):
+        response = self.client.get(reverse('user_posts-feed-rss', args=['alice']))
+        self.assertContains(response, 'Posts by alice')
+        self.assertEqual(self.client.get(reverse('user_posts-feed-rss', args=['nobody'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('user_posts-feed-json', args=['nobody'])).status_code, 404)
+
+    def test_links_follow_the_request_host(self):
+        url = reverse('blog-feed-rss')
+        self.client.get(url, HTTP_HOST='evil.example')
+        response = self.client.get(url, HTTP_HOST='myblog.example')
+        self.assertContains(response, 'http://myblog.example/')
+        self.assertNotContains(response, 'evil.example')
+
+
+@mock.patch('blog.sitemaps.SITEMAP_CHUNK_SIZE', 2)
+@mock.patch.object(IdRangeSitemap, 'limit', 2)
+class SitemapTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice')
+        cls.posts = [Post.objects.create(title=f'Post {i}', content='', author=cls.alice) for i in range(4)]
+
+    def setUp(self):
+        cache.clear()
+
+    def chunk_of(self, pk):
+        return -(-pk // 2)
+
+    def section(self, name, page):
+        return self.client.get(reverse('sitemap-section', args=[name]) + f'?p={page}')
+
+    def test_index_lists_every_chunk(self):
+        response = self.client.get(reverse('sitemap-index'))
+        pages = self.chunk_of(max(post.pk for post in self.posts))
+        self.assertContains(response, 'sitemap-posts.xml?p=', count=pages - 1)
+
+    def test_saving_a_post_only_touches_its_chunk(self):
+        first, last = self.posts[0], self.posts[-1]
+        first_chunk, last_chunk = self.chunk_of(first.pk), self.chunk_of(last.pk)
+        self.assertNotEqual(first_chunk, last_chunk)
+        for page in (first_chunk, last_chunk):
+            self.assertEqual(self.section('posts', page).status_code, 200)
+        stamps = cache.get_many([_chunk_key('posts', first_chunk), _chunk_key('posts', last_chunk)])
+
+        last.title = 'Edited'
+        last.save()
+        self.assertEqual(cache.get(_chunk_key('posts', first_chunk)), stamps[_chunk_key('posts', first_chunk)])
+        self.assertGreater(cache.get(_chunk_key('posts', last_chunk)), stamps[_chunk_key('posts', last_chunk)])
+
+    def test_unpublished_posts_leave_the_sitemap(self):
+        post = self.posts[0]
+        url = reverse('post-detail', args=[post.pk])
+        self.assertContains(self.section('posts', self.chunk_of(post.pk)), url)
+        post.is_published = False
+        post.save()
+        self.assertNotContains(self.section('posts', self.chunk_of(post.pk)), url)
+
+    def test_invalid_pages_are_not_found_and_not_cached(self):
+        for page in ('99', '0', 'x'):
+            self.assertEqual(self.section('posts', page).status_code, 404)
+        self.assertIsNone(cache.get(_chunk_key('posts', 99)))
+        self.assertEqual(self.client.get(reverse('sitemap-section', args=['nope'])).status_code, 404)
+
+    def test_renaming_an_author_refreshes_the_authors_chunk(self):
+        page = self.chunk_of(self.alice.pk)
+        self.assertContains(self.section('authors', page), '/user/alice')
+        self.alice.username = 'alicia'
+        self.alice.save()
+        response = self.section('authors', page)
+        self.assertContains(response, '/user/alicia')
+        self.assertNotContains(response, '/user/alice<')
+
+
+class ModerationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice')
+        cls.bob = User.objects.create_user('bob')
+        old = timezone.make_aware(datetime.datetime(2020, 1, 1))
+        cls.spam = [Post.objects.create(title=f'Buy now {i}', content='', author=cls.bob) for i in range(5)]
+        cls.old = Post.objects.create(title='Old news', content='', author=cls.alice, date_posted=old)
+        cls.keep = Post.objects.create(title='Keep me', content='Cheap pills', author=cls.alice)
+        for post in cls.spam:
+            post.likes.add(cls.alice)
+            Comment.objects.create(post=post, name='alice', body='Spam!')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_delete_in_batches_removes_comments_and_likes(self):
+        changed = posts_changed_at()
+        with self.assertNumQueries(3 * 7 + 1):
+            # Per batch: the page of ids, then in a savepoint the collector's id fetch
+            # and one DELETE each for likes, comments and posts. Then the last, empty page.
+            handled = moderate_posts(select_posts(author='bob'), DELETE, batch_size=2)
+        self.assertEqual(handled, 5)
+        self.assertFalse(Post.objects.filter(author=self.bob).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Post.likes.through.objects.exists())
+        self.assertTrue(Post.objects.filter(pk=self.keep.pk).exists())
+        self.assertGreater(posts_changed_at(), changed)
+
+    def test_unpublish_and_publish(self):
+        moderate_posts(select_posts(author='bob'), UNPUBLISH, batch_size=2)
+        self.assertEqual(Post.objects.filter(is_published=False).count(), 5)
+        self.assertEqual(Comment.objects.count(), 5)
+
+        moderate_posts(select_posts(author='bob'), PUBLISH)
+        self.assertFalse(Post.objects.filter(is_published=False).exists())
+
+    def test_unknown_action(self):
+        with self.assertRaises(ValueError):
+            moderate_posts(Post.objects.all(), 'burn')
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('moderate_posts', *args, stdout=out)
+        return out.getvalue()
+
+    def test_command_filters(self):
+        self.assertEqual(self.call('unpublish', '--keyword', 'pills', '--dry-run'), '1 posts would be unpublished.\n')
+        self.assertIn('1 posts unpublished.', self.call('unpublish', '--until', '2021-01-01'))
+        self.assertFalse(Post.objects.get(pk=self.old.pk).is_published)
+
+        self.assertIn('5 posts deleted.', self.call('delete', '--author', 'bob', '--since', '2021-01-01'))
+        self.assertEqual(set(Post.objects.values_list('pk', flat=True)), {self.old.pk, self.keep.pk})
+
+    def test_command_rejects_bad_arguments(self):
+        with self.assertRaisesMessage(CommandError, "'notadate' is not a valid date or datetime."):
+            self.call('delete', '--since', 'notadate')
+        with self.assertRaisesMessage(CommandError, 'Give at least one of'):
+            self.call('delete')
+        with self.assertRaisesMessage(CommandError, '--batch-size must be positive.'):
+            self.call('delete', '--author', 'bob', '--batch-size', '0')
+        self.assertEqual(Post.objects.count(), 7)
+
+
+class PostAdminTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.posts = [Post.objects.create(title=f'Post {i}', content='', author=cls.admin) for i in range(3)]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_delete_asks_for_confirmation_first(self):
+        url = reverse('admin:blog_post_changelist')
+        selected = [self.posts[0].pk, self.posts[1].pk]
+        response = self.client.post(url, {'action': 'delete_posts', '_selected_action': selected})
+        self.assertContains(response, 'Are you sure you want to delete 2 posts?')
+        self.assertEqual(Post.objects.count(), 3)
+
+        response = self.client.post(url, {'action': 'delete_posts', '_selected_action': selected, 'post': 'yes'})
+        self.assertRedirects(response, url)
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)), [self.posts[2].pk])
+
+    def test_default_bulk_delete_is_gone(self):
+        response = self.client.get(reverse('admin:blog_post_changelist'))
+        self.assertNotContains(response, 'value="delete_selected"')
+        self.assertContains(response, 'value="delete_posts"')
+
+
+class AdminSearchAndListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.post = Post.objects.create(title='Django tips', content='<p>' + 'x' * 1000 + '</p>', author=cls.admin)
+        Post.objects.create(title='More django', content='', author=cls.admin)
+        Comment.objects.create(post=cls.post, name='Carol', body='Thanks')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def search(self, model, term):
+        response = self.client.get(reverse(f'admin:{model}_changelist'), {'q': term})
+        return [str(obj) for obj in response.context['cl'].result_list]
+
+    def test_prefix_search(self):
+        self.assertEqual(self.search('blog_post', 'Django'), ['Django tips'])
+        self.assertEqual(self.search('blog_post', 'tips'), [])
+        self.assertEqual(self.search('blog_comment', 'Car'), ['Django tips-Carol'])
+        self.assertEqual(self.search('users_profile', 'adm'), ['admin Profile'])
+
+    def test_search_does_not_wrap_columns_in_upper(self):
+        # UPPER(column) can't use an index. (SQLite's LIKE ignores ASCII case by
+        # itself; PostgreSQL's doesn't.)
+        with CaptureQueriesContext(connection) as queries:
+            self.search('blog_post', 'Django')
+        searches = [query['sql'] for query in queries.captured_queries if 'LIKE' in query['sql']]
+        self.assertTrue(searches)
+        for sql in searches:
+            self.assertNotIn('UPPER', sql)
+            self.assertIn('"auth_user"."username" = \'Django\'', sql)
+
+    def test_username_search_is_exact(self):
+        self.assertEqual(len(self.search('blog_post', 'admin')), 2)
+        self.assertEqual(self.search('blog_post', 'adm'), [])
+
+    def test_comment_list_does_not_load_post_content(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:blog_comment_changelist'))
+        self.assertContains(response, 'Django tips')
+        listing = [query['sql'] for query in queries.captured_queries if 'FROM "blog_comment"' in query['sql']]
+        self.assertTrue(listing)
+        for sql in listing:
+            self.assertNotIn('"blog_post"."content"', sql)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        alice = User.objects.create_user('alice')
+        for i in range(3):
+            Post.objects.create(title=f'Post {i}', content='', author=alice)
+
+    def paginator(self, queryset, vendor='postgresql', reltuples=250000.0):
+        fake = mock.MagicMock(vendor=vendor)
+        fake.cursor.return_value.__enter__.return_value.fetchone.return_value = (reltuples,)
+        patcher = mock.patch('blog.paginators.connections', {'default': fake})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return EstimatedCountPaginator(queryset, 10), fake
+
+    def test_large_unfiltered_table_uses_the_estimate(self):
+        paginator, fake = self.paginator(Post.objects.order_by('pk'))
+        self.assertEqual(paginator.count, 250000)
+        self.assertEqual(paginator.num_pages, 25000)
+        fake.cursor.return_value.__enter__.return_value.execute.assert_called_once_with(
+            'SELECT reltuples FROM pg_class WHERE relname = %s', ['blog_post'])
+
+    def test_small_tables_are_counted(self):
+        paginator, _ = self.paginator(Post.objects.order_by('pk'), reltuples=50.0)
+        self.assertEqual(paginator.count, 3)
+
+    def test_filtered_querysets_are_counted(self):
+        paginator, fake = self.paginator(Post.objects.filter(title='Post 1').order_by('pk'))
+        self.assertEqual(paginator.count, 1)
+        fake.cursor.assert_not_called()
+
+    def test_other_databases_are_counted(self):
+        paginator, fake = self.paginator(Post.objects.order_by('pk'), vendor='sqlite')
+        self.assertEqual(paginator.count, 3)
+        fake.cursor.assert_not_called()
+
+
+# The markup home.html rendered inline before {% post_card %} and {% pagination %}.
+OLD_POST_CARD = Template("""
+    <article class="media content-section">
+        <img class="rounded-circle article-img" src="{{ post.author.profile.image.url }}">
+        <div class="media-body">
+            <div class="article-metadata">
+                <a class="mr-2" href="{% url 'user_posts' post.author.username %}">{{ post.author }}</a>
+                <small class="text-muted">{{ post.date_posted|date:"F d, Y" }}</small>
+            </div>
+            <h2><a class="article-title" href="{% url 'post-detail' post.id %}">{{ post.title }}</a></h2>
+            <p class="article-content">{{ post.content | safe }}</p>
+        </div>
+    </article>
+""")
+
+OLD_PAGINATION = Template("""
+    {% if posts.has_previous %}
+        <a class="btn btn-outline-info mb-4" href="?page=1">First</a>
+        <a class="btn btn-outline-info mb-4" href="?page={{ posts.previous_page_number }}">Previous</a>
+    {% endif %}
+    {% for num in posts.paginator.page_range %}
+        {% if posts.number == num %}
+            <a class="btn btn-info mb-4" href="?page={{ num }}">{{ num }}</a>
+        {% elif num > posts.number|add:'-3' and num < posts.number|add:'3' %}
+            <a class="btn btn-outline-info mb-4" href="?page={{ num }}">{{ num }}</a>
+        {% endif %}
+    {% endfor %}
+    {% if posts.has_next %}
+        <a class="btn btn-outline-info mb-4" href="?page={{ posts.next_page_number }}">Next</a>
+        <a class="btn btn-outline-info mb-4" href="?page={{ posts.paginator.num_pages }}">Last</a>
+    {% endif %}
+""")
+
+
+def squash(html):
+    return re.sub(r'>\s+<', '><', html.strip())
+
+
+class BlogTagsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('alice')
+        # Just after midnight in UTC, still the previous day in New York.
+        cls.post = Post.objects.create(
+            title='Fish & <Chips>', content='<b>Bold</b> & more', author=cls.author,
+            date_posted=datetime.datetime(2026, 1, 1, 2, 30, tzinfo=datetime.timezone.utc),
+        )
+
+    def assertSameMarkup(self, new, old):
+        self.assertEqual(squash(new), squash(old))
+
+    def test_post_card_matches_the_old_markup(self):
+        for zone in ('UTC', 'America/New_York'):
+            with self.subTest(zone=zone), timezone.override(zone):
+                self.assertSameMarkup(
+                    post_card(self.post, raw_content=True),
+                    OLD_POST_CARD.render(Context({'post': self.post})),
+                )
+
+    def test_post_card_uses_the_current_time_zone(self):
+        with timezone.override('America/New_York'):
+            self.assertIn('December 31, 2025', post_card(self.post))
+
+    def test_post_card_escapes_content_unless_raw(self):
+        self.assertIn('&lt;b&gt;Bold&lt;/b&gt; &amp; more', post_card(self.post))
+        self.assertIn('<b>Bold</b> & more', post_card(self.post, raw_content=True))
+        self.assertIn('Fish &amp; &lt;Chips&gt;', post_card(self.post, raw_content=True))
+
+    def test_pagination_matches_the_old_markup(self):
+        for num_pages in (1, 2, 5, 12):
+            paginator = Paginator(range(num_pages * 5), 5)
+            for number in paginator.page_range:
+                page = paginator.page(number)
+                with self.subTest(num_pages=num_pages, number=number):
+                    self.assertSameMarkup(pagination(page), OLD_PAGINATION.render(Context({'posts': page})))
+
+
+class FakeWebSocket:
+    """
+    Drive ``websocket_application`` through ASGI events.
+    """
+
+    def __init__(self, path, origin=None, cookie=None):
+        headers = [(b'host', b'testserver')]
+        if origin:
+            headers.append((b'origin', origin.encode()))
+        if cookie:
+            headers.append((b'cookie', cookie.encode()))
+        self.scope = {'type': 'websocket', 'path': path, 'headers': headers}
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+        self.task = None
+        self.dropped = False
+        self.stalled = False
+        self.stalled_send = asyncio.Event()
+        self.send_unwound = False
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, event):
+        if self.dropped:
+            raise OSError('Connection reset by peer')
+        if self.stalled:
+            # Like a server flushing to a client that stopped reading.
+            self.stalled_send.set()
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await asyncio.sleep(0)
+                self.send_unwound = True
+        await self.outgoing.put(event)
+
+    async def connect(self):
+        self.incoming.put_nowait({'type': 'websocket.connect'})
+        self.task = asyncio.create_task(websocket_application(self.scope, self.receive, self.send))
+        return await self.next_event()
+
+    async def next_event(self):
+        return await asyncio.wait_for(self.outgoing.get(), 2)
+
+    async def next_message(self):
+        event = await self.next_event()
+        self.assert_type(event, 'websocket.send')
+        return json.loads(event['text'])
+
+    @staticmethod
+    def assert_type(event, expected):
+        assert event['type'] == expected, event
+
+    async def say(self, message):
+        self.incoming.put_nowait({'type': 'websocket.receive', 'text': json.dumps({'message': message})})
+
+    async def disconnect(self):
+        self.incoming.put_nowait({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(self.task, 2)
+
+
+class RealtimeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice')
+        cls.post = Post.objects.create(title='Live', content='', author=cls.alice)
+        cls.hidden = Post.objects.create(title='Draft', content='', author=cls.alice, is_published=False)
+
+    def path(self, post=None):
+        return f'/ws/post/{(post or self.post).pk}/'
+
+    def session_cookie(self):
+        self.client.force_login(self.alice)
+        return f'sessionid={self.client.cookies["sessionid"].value}'
+
+    def comment_committed(self, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, name='bob', body=body)
+
+    def comment_rolled_back(self, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Comment.objects.create(post=self.post, name='bob', body=body)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+    def like_committed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.likes.add(self.alice)
+
+    async def test_rejects_unknown_posts_and_foreign_origins(self):
+        for socket, code in [
+            (FakeWebSocket('/ws/post/999999/'), 4004),
+            (FakeWebSocket(self.path(self.hidden)), 4004),
+            (FakeWebSocket('/ws/nope/'), 4004),
+            (FakeWebSocket(self.path(), origin='https://evil.example'), 4003),
+        ]:
+            self.assertEqual(await socket.connect(), {'type': 'websocket.close', 'code': code})
+
+    async def test_committed_comments_and_likes_fan_out(self):
+        sockets = [FakeWebSocket(self.path()), FakeWebSocket(self.path(), origin='http://testserver')]
+        for socket in sockets:
+            self.assertEqual(await socket.connect(), {'type': 'websocket.accept'})
+
+        await sync_to_async(self.comment_rolled_back)('Never happened')
+        await sync_to_async(self.comment_committed)('First!')
+        await sync_to_async(self.like_committed)()
+        for socket in sockets:
+            comment = await socket.next_message()
+            self.assertEqual((comment['type'], comment['name'], comment['body']), ('comment', 'bob', 'First!'))
+            self.assertEqual(await socket.next_message(), {'type': 'likes', 'count': 1})
+            await socket.disconnect()
+
+    async def test_only_logged_in_users_can_chat(self):
+        anonymous = FakeWebSocket('/ws/club/books/')
+        member = FakeWebSocket('/ws/club/books/', cookie=await sync_to_async(self.session_cookie)())
+        await anonymous.connect()
+        await member.connect()
+
+        await anonymous.say('hello from nobody')
+        await member.say('  hello from alice  ')
+        for socket in (anonymous, member):
+            message = await socket.next_message()
+            self.assertEqual((message['type'], message['user'], message['message']),
+                             ('chat', 'alice', 'hello from alice'))
+            self.assertTrue(socket.outgoing.empty())
+            await socket.disconnect()
+
+    @staticmethod
+    def forward_tasks():
+        return [task for task in asyncio.all_tasks() if task.get_coro().__name__ == '_forward']
+
+    async def test_stalled_send_is_unwound_before_the_connection_closes(self):
+        socket = FakeWebSocket(self.path())
+        await socket.connect()
+        socket.stalled = True
+        await sync_to_async(self.comment_committed)('Slowly')
+        await asyncio.wait_for(socket.stalled_send.wait(), 2)
+        unwound_on_close = []
+        socket.task.add_done_callback(lambda task: unwound_on_close.append(socket.send_unwound))
+        await socket.disconnect()
+        self.assertEqual(unwound_on_close, [True])
+        self.assertEqual(self.forward_tasks(), [])
 
-# Create your tests here.
+    async def test_failed_send_to_a_dropped_client_ends_cleanly(self):
+        socket = FakeWebSocket(self.path())
+        await socket.connect()
+        socket.dropped = True
+        await sync_to_async(self.comment_committed)('Into the void')
+        await socket.disconnect()
+        self.assertIsNone(socket.task.result())
+        self.assertEqual(self.forward_tasks(), [])
@@ -7,6 +7,17 @@ from .views import PostListView,\
     PostDeleteView,\
     UserPostListView,\
     LikeView
+from .feeds import LatestPostsFeed,\
+    LatestPostsAtomFeed,\
+    LatestPostsJsonFeed,\
+    cached_feed
+from .sitemaps import sitemap_index, sitemap_section
+from .api import PostListApiView,\
+    PostDetailApiView,\
+    CommentListApiView,\
+    LikeListApiView,\
+    AuthorListApiView,\
+    AuthorDetailApiView
 
 
 urlpatterns = [
@@ -17,7 +28,19 @@ urlpatterns = [
     path('post/<int:pk>/update/', PostUpdateView.as_view(), name='post-update'),
     path('post/<int:pk>/delete/', PostDeleteView.as_view(), name='post-delete'),
     path('about/', AboutView.as_view(), name='blog-about'),
-    path('like/<int:pk>', LikeView.as_view(), name="like-post")
+    path('like/<int:pk>', LikeView.as_view(), name="like-post"),
+    path('feed/rss/', cached_feed(LatestPostsFeed()), name='blog-feed-rss'),
+    path('feed/atom/', cached_feed(LatestPostsAtomFeed()), name='blog-feed-atom'),
+    path('feed/json/', cached_feed(LatestPostsJsonFeed.as_view()), name='blog-feed-json'),
+    path('user/<str:username>/feed/rss/', cached_feed(LatestPostsFeed()), name='user_posts-feed-rss'),
+    path('user/<str:username>/feed/atom/', cached_feed(LatestPostsAtomFeed()), name='user_posts-feed-atom'),
+    path('user/<str:username>/feed/json/', cached_feed(LatestPostsJsonFeed.as_view()), name='user_posts-feed-json'),
+    path('sitemap.xml', sitemap_index, name='sitemap-index'),
+    path('sitemap-<slug:section>.xml', sitemap_section, name='sitemap-section'),
+    path('api/v1/posts/', PostListApiView.as_view(), name='api-post-list'),
+    path('api/v1/posts/<int:pk>/', PostDetailApiView.as_view(), name='api-post-detail'),
+    path('api/v1/posts/<int:pk>/comments/', CommentListApiView.as_view(), name='api-post-comments'),
+    path('api/v1/posts/<int:pk>/likes/', LikeListApiView.as_view(), name='api-post-likes'),
+    path('api/v1/authors/', AuthorListApiView.as_view(), name='api-author-list'),
+    path('api/v1/authors/<str:username>/', AuthorDetailApiView.as_view(), name='api-author-detail'),
 ]
-
-
@@ -9,7 +9,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from .forms import CreateBlogPostForm
 from django.core.paginator import Paginator
 from .forms import CommentForm
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, Http404
 # annotate, agreegate, ORM, jquery-html-ajax (sayfa yenileme), javascript, view parçalama, biraz daha karmaşık yazma,
 # crud yorum için de, başka crud uğraşma, ekranlara filtreler uygula, toplam okuma, üye sayısı, bir kişi 2 farklı kulüpte aynı postu yayınlayabilir,
 # basketol-beşiktaş, chat eklenebilir
@@ -17,7 +17,7 @@ from django.http import HttpResponseRedirect
 
 class PostListView(View):
     def get(self, request, *args, **kwargs):
-        data = Post.objects.all().order_by("-date_posted")
+        data = Post.objects.filter(is_published=True).select_related('author__profile').order_by("-date_posted")
         paginator = Paginator(data, 4)
         page_number = request.GET.get('page')
         page_obj = paginator.get_page(page_number)
@@ -30,13 +30,13 @@ class UserPostListView(View):
     def get(self, request, *args, **kwargs):
         username = self.kwargs.get('username')
         posts = Post.objects.filter(
-            author__username=username).order_by("-date_posted")
+            author__username=username, is_published=True).select_related('author__profile').order_by("-date_posted")
 
         paginator = Paginator(posts, 10)
         page_number = request.GET.get('page')
         page_obj = paginator.get_page(page_number)
 
-        context = {"posts": page_obj, "is_paginated": True}
+        context = {"posts": page_obj, "is_paginated": True, "username": username}
         template_name = "blog/user_posts.html"
         return render(request, template_name, context)
 
@@ -45,6 +45,8 @@ class PostDetailView(View):
     def get(self, request, *args, **kwargs):
         post_id = self.kwargs.get('pk')
         post_detail = get_object_or_404(Post, id=post_id)
+        if not post_detail.is_published and post_detail.author_id != request.user.id:
+            raise Http404("No Post matches the given query.")
         # form = CommentForm(request.POST)
         context = {"object": post_detail, "post": posts}
         template_name = "blog/post_detail.html"
@@ -86,16 +88,18 @@ class PostUpdateView(LoginRequiredMixin, View, UserPassesTestMixin):
         return redirect('blog-home')
 
 
-class PostDeleteView(View):
+class PostDeleteView(LoginRequiredMixin, View):
+    login_url = '/login/'
+
     def post(self, request, pk):
-        post = Post.objects.get(pk=pk)
+        post = get_object_or_404(Post, pk=pk, author=request.user)
         post.delete()
         return redirect('blog-home')
 
 
 class HomeView(View):
     context = {
-        'posts': Post.objects.all(),
+        'posts': Post.objects.filter(is_published=True),
     }
     template_name = 'blog/home.html'
 
@@ -114,10 +118,11 @@ class AboutView(View):
         return render(request, self.template_name, self.context)
 
 
-class LikeView(View):
+class LikeView(LoginRequiredMixin, View):
+    login_url = '/login/'
 
-    def get(self, request, pk):
-        post = get_object_or_404(Post, request.POST.get('post_id'))
+    def post(self, request, pk):
+        post = get_object_or_404(Post, pk=pk)
         post.likes.add(request.user)
         return HttpResponseRedirect(reverse('post-detail', args=[str(pk)]))
 
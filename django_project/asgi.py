@@ -2,6 +2,9 @@
 ASGI config for django_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django and WebSocket connections to ``blog.realtime``,
+so serve it with a WebSocket capable server, e.g.
+``uvicorn django_project.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
@@ -13,4 +16,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from blog.realtime import websocket_application  # noqa: E402  (needs the app registry loaded above)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -35,6 +35,8 @@ ALLOWED_HOSTS = ['*']
 INSTALLED_APPS = [
     'blog.apps.BlogConfig',
     'users.apps.UsersConfig',
+    'library.apps.LibraryConfig',
+    'perf.apps.PerfConfig',
     'crispy_forms',
     'django.contrib.admin',
     'django.contrib.auth',
@@ -42,15 +44,18 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.sitemaps',
     'ckeditor',
 ]
 
 MIDDLEWARE = [
+    'perf.middleware.PerfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'ratelimit.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,6 +66,9 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
+        # With DEBUG off Django wraps these loaders in the cached loader, so
+        # templates are parsed once per process. With DEBUG on they're read on
+        # every render, since uvicorn's --reload doesn't watch template files.
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -84,6 +92,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # A file rather than the shared in-memory database, so concurrent tests get real locking.
+        'TEST': {'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3')},
     }
 }
 
@@ -148,3 +158,39 @@ LOGIN_REDIRECT_URL = 'blog-home'
 
 LOGIN_URL = 'login'
 
+
+# Largest profile image accepted by users.uploads.ProfileImageUploadHandler and the chunked upload view.
+PROFILE_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+
+# Extra domains rejected at registration on top of users/disposable_domains.txt (see users.disposable).
+DISPOSABLE_EMAIL_BLOCKLIST = []
+
+# Request tracing (see perf.middleware). 0 turns it off; 0.01 traces one request in a hundred.
+PERF_SAMPLE_RATE = 0
+# Sampled requests slower than PERF_SLOW_MS are appended to PERF_LOG_FILE as JSON lines.
+PERF_SLOW_MS = 500
+PERF_LOG_FILE = os.path.join(BASE_DIR, 'perf.jsonl')
+# Besides staff users, only these addresses can open /_debug/perf, and only with DEBUG on.
+INTERNAL_IPS = ['127.0.0.1']
+
+# Rate limits for writes to these URL names, per user and per client IP (see ratelimit.middleware).
+RATELIMITS = {
+    'like-post': '30/m',
+    'post-create': '10/m',
+    'register': '5/h',
+    'login': '10/m',
+}
+# A cache of its own, so feed and sitemap entries can't evict the counters.
+# With more than one process both caches should point at a shared backend such as Redis.
+RATELIMIT_CACHE = 'ratelimit'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ratelimit',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
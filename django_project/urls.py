@@ -19,20 +19,27 @@ from users import views as user_views
 from django.contrib.auth import views as auth_views  # TODO:  I import this way since there are other views and
 from django.conf import settings
 from django.conf.urls.static import static
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+from perf.views import PerfView
 
 # I don't want to mix them up
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('_debug/perf', PerfView.as_view(), name='perf'),
     path('register/', user_views.Register.as_view(), name='register'),
     path('profile/', user_views.profile, name='profile'),
+    path('profile/image/', user_views.ProfileImageChunkUploadView.as_view(), name='profile-image-upload'),
     path('login/', auth_views.LoginView.as_view(template_name='users/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(template_name='users/logout.html'), name='logout'),
+    path('library/', include('library.urls')),
     path('', include('blog.urls')),  # TODO: I typed this code not to see error at the localhost:8000 page!
 ]
 
 
 if settings.DEBUG:
+    # runserver serves static files itself; uvicorn (see docker-compose.yml) needs these routes.
+    urlpatterns += staticfiles_urlpatterns()
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
@@ -0,0 +1,27 @@
+from django.contrib import admin
+from .models import Library, Book, Borrowed
+
+
+class LibraryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'librarian')
+    list_select_related = ('librarian',)
+    raw_id_fields = ('librarian',)
+
+
+class BookAdmin(admin.ModelAdmin):
+    list_display = ('title', 'author', 'location', 'available')
+    list_select_related = ('location',)
+    list_filter = ('available',)
+    search_fields = ('^title', '=isbn')
+    raw_id_fields = ('location',)
+
+
+class BorrowedAdmin(admin.ModelAdmin):
+    list_display = ('book', 'borrowed_by', 'borrow_date', 'returned')
+    list_select_related = ('book', 'borrowed_by')
+    raw_id_fields = ('book', 'borrowed_by')
+
+
+admin.site.register(Library, LibraryAdmin)
+admin.site.register(Book, BookAdmin)
+admin.site.register(Borrowed, BorrowedAdmin)
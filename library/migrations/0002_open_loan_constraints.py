@@ -0,0 +1,21 @@
+# Generated by Django 4.0.6 on 2026-10-19 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrowed',
+            index=models.Index(condition=models.Q(('returned__isnull', True)), fields=['borrowed_by'], name='library_open_loans_by_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='borrowed',
+            constraint=models.UniqueConstraint(condition=models.Q(('returned__isnull', True)), fields=('book',), name='library_one_open_loan_per_book'),
+        ),
+    ]
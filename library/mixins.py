@@ -0,0 +1,10 @@
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+
+
+class LibrarianPermissionRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
+    """
+    Only let in users who run a library (``request.user.library``).
+    """
+
+    def test_func(self):
+        return hasattr(self.request.user, 'library')
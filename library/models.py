@@ -0,0 +1,52 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+
+class Library(models.Model):
+    name = models.CharField(max_length=150)
+    librarian = models.OneToOneField(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='library')
+
+    def __str__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return reverse('library_detail', kwargs={'pk': self.pk})
+
+
+class Book(models.Model):
+    title = models.CharField(max_length=255)
+    author = models.CharField(max_length=255)
+    isbn = models.CharField(max_length=20, blank=True, null=True)
+    info = models.TextField(blank=True, null=True)
+    image_src = models.URLField(max_length=500, blank=True, null=True)
+    location = models.ForeignKey(Library, on_delete=models.CASCADE, related_name='books')
+    available = models.BooleanField(default=True)
+
+    def __str__(self):
+        return self.title
+
+    def get_absolute_url(self):
+        return reverse('book_detail', kwargs={'pk': self.pk})
+
+
+class Borrowed(models.Model):
+    borrowed_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='borrowed_books')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='loans')
+    borrow_date = models.DateField()
+    latest_return_date = models.DateField()
+    returned = models.DateField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            # A copy can only be out on one open loan; also indexes the open loans of a book.
+            models.UniqueConstraint(fields=['book'], condition=models.Q(returned__isnull=True),
+                                    name='library_one_open_loan_per_book'),
+        ]
+        indexes = [
+            models.Index(fields=['borrowed_by'], condition=models.Q(returned__isnull=True),
+                         name='library_open_loans_by_user'),
+        ]
+
+    def __str__(self):
+        return f'{self.book.title} - {self.borrowed_by.username}'
@@ -0,0 +1,131 @@
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from .models import Library, Book, Borrowed
+from .views import MAX_OPEN_LOANS
+
+THREADS = 16
+
+
+class ConcurrentLoanTests(TransactionTestCase):
+    """
+    Fire the same borrow/return request from many threads at once, each with
+    its own client and database connection, and check that no copy is lent
+    twice and no user goes over the loan limit.
+    """
+
+    def setUp(self):
+        librarian = User.objects.create_user('librarian')
+        self.library = Library.objects.create(librarian=librarian, name='Central')
+
+    def add_book(self, title='Dune'):
+        return Book.objects.create(title=title, author='Frank Herbert', location=self.library)
+
+    def client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def run_concurrently(self, requests):
+        """
+        Run every ``(client, url, data)`` POST in its own thread, released at
+        the same moment.
+        """
+        barrier = threading.Barrier(len(requests))
+        errors = []
+
+        def worker(client, url, data):
+            try:
+                barrier.wait()
+                client.post(url, data)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=request) for request in requests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_one_copy_is_lent_once(self):
+        book = self.add_book()
+        url = reverse('borrow_book', kwargs={'pk': book.pk})
+        users = [User.objects.create_user(f'reader{i}') for i in range(THREADS)]
+        self.run_concurrently([(self.client_for(user), url, {'confirm_borrow': ''}) for user in users])
+
+        self.assertEqual(Borrowed.objects.filter(book=book, returned__isnull=True).count(), 1)
+        book.refresh_from_db()
+        self.assertFalse(book.available)
+
+    def test_loan_limit_holds_under_parallel_borrows(self):
+        user = User.objects.create_user('reader')
+        client = self.client_for(user)
+        books = [self.add_book(f'Book {i}') for i in range(THREADS)]
+        self.run_concurrently([
+            (client, reverse('borrow_book', kwargs={'pk': book.pk}), {'confirm_borrow': ''}) for book in books
+        ])
+
+        self.assertEqual(Borrowed.objects.filter(borrowed_by=user, returned__isnull=True).count(), MAX_OPEN_LOANS)
+        self.assertEqual(Book.objects.filter(available=False).count(), MAX_OPEN_LOANS)
+
+    def test_parallel_returns_close_the_loan_once(self):
+        user = User.objects.create_user('reader')
+        book = self.add_book()
+        client = self.client_for(user)
+        client.post(reverse('borrow_book', kwargs={'pk': book.pk}), {'confirm_borrow': ''})
+        url = reverse('return_book', kwargs={'pk': book.pk})
+        self.run_concurrently([(client, url, {'confirm_return': ''})] * THREADS)
+
+        self.assertEqual(Borrowed.objects.filter(book=book).count(), 1)
+        self.assertTrue(Borrowed.objects.get(book=book).returned)
+        book.refresh_from_db()
+        self.assertTrue(book.available)
+
+
+class BookDeletedAfterCommitTests(TestCase):
+    """
+    A librarian may delete the book between a borrow or return committing
+    and the dashboard stats being invalidated.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        librarian = User.objects.create_user('librarian')
+        cls.library = Library.objects.create(librarian=librarian, name='Central')
+        cls.reader = User.objects.create_user('reader')
+
+    def setUp(self):
+        self.book = Book.objects.create(title='Dune', author='Frank Herbert', location=self.library)
+        self.client.force_login(self.reader)
+
+    @contextmanager
+    def book_deleted_after_commit(self):
+        @contextmanager
+        def atomic():
+            with transaction.atomic():
+                yield
+            Book.objects.filter(pk=self.book.pk).delete()
+
+        views_transaction = SimpleNamespace(atomic=atomic, set_rollback=transaction.set_rollback)
+        with mock.patch('library.views.transaction', views_transaction):
+            yield
+
+    def test_borrow(self):
+        with self.book_deleted_after_commit():
+            response = self.client.post(reverse('borrow_book', kwargs={'pk': self.book.pk}), {'confirm_borrow': ''})
+        self.assertRedirects(response, reverse('book_detail', kwargs={'pk': self.book.pk}), target_status_code=404)
+
+    def test_return(self):
+        self.client.post(reverse('borrow_book', kwargs={'pk': self.book.pk}), {'confirm_borrow': ''})
+        with self.book_deleted_after_commit():
+            response = self.client.post(reverse('return_book', kwargs={'pk': self.book.pk}), {'confirm_return': ''})
+        self.assertRedirects(response, reverse('book_detail', kwargs={'pk': self.book.pk}), target_status_code=404)
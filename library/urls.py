@@ -0,0 +1,25 @@
+from django.urls import path
+from .views import LibraryView,\
+    LibraryDetailView,\
+    BookDetailView,\
+    LibrarianDashboardView,\
+    AddBookView,\
+    DeleteBookView,\
+    EditBookView,\
+    BorrowBookView,\
+    ReturnBookView,\
+    AddBookFromGoogleView
+
+
+urlpatterns = [
+    path('', LibraryView.as_view(), name='library'),
+    path('<int:pk>/', LibraryDetailView.as_view(), name='library_detail'),
+    path('book/<int:pk>/', BookDetailView.as_view(), name='book_detail'),
+    path('dashboard/', LibrarianDashboardView.as_view(), name='dashboard'),
+    path('book/add/', AddBookView.as_view(), name='add_book'),
+    path('book/add/google/<int:index>/', AddBookFromGoogleView.as_view(), name='add_book_from_google'),
+    path('book/<int:pk>/delete/', DeleteBookView.as_view(), name='delete_book'),
+    path('book/<int:pk>/edit/', EditBookView.as_view(), name='edit_book'),
+    path('book/<int:pk>/borrow/', BorrowBookView.as_view(), name='borrow_book'),
+    path('book/<int:pk>/return/', ReturnBookView.as_view(), name='return_book'),
+]
@@ -0,0 +1,230 @@
+import datetime
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Q
+from django.shortcuts import render, redirect, get_object_or_404
+from django.views import View
+from .models import Library, Book, Borrowed
+from .forms import BookForm
+from .mixins import LibrarianPermissionRequiredMixin
+
+BOOKS_PER_PAGE = 12
+FREQUENT_BOOKS = 5
+LENT_BOOKS_SHOWN = 20
+DASHBOARD_STATS_TIMEOUT = 5 * 60
+
+
+def dashboard_stats_key(library_id):
+    return f'library:{library_id}:dashboard-stats'
+
+
+def invalidate_dashboard_stats(library_id):
+    cache.delete(dashboard_stats_key(library_id))
+
+
+def dashboard_stats(library_id):
+    """
+    Borrow statistics of a library, cached until a book of it is added,
+    deleted, borrowed or returned. The entry also expires after
+    ``DASHBOARD_STATS_TIMEOUT`` seconds, as the invalidation only reaches
+    other workers when they share the cache.
+    """
+    key = dashboard_stats_key(library_id)
+    stats = cache.get(key)
+    if stats is None:
+        loans = Borrowed.objects.filter(book__location=library_id)
+        stats = loans.aggregate(
+            borrowed_count=Count('id'),
+            lent_count=Count('id', filter=Q(returned__isnull=True)),
+        )
+        stats['book_count'] = Book.objects.filter(location=library_id).count()
+
+        frequent = list(
+            loans.values('book_id', 'book__title').annotate(count_borrow=Count('id')).order_by('-count_borrow')[:FREQUENT_BOOKS]
+        )
+        top = frequent[0]['count_borrow'] if frequent else 0
+        for book in frequent:
+            book['percentage'] = book['count_borrow'] * 100 // top
+        stats['frequent'] = frequent
+        cache.set(key, stats, DASHBOARD_STATS_TIMEOUT)
+    return stats
+
+
+def book_page(library_id, after=None):
+    """
+    Up to ``BOOKS_PER_PAGE`` books of a library with an id above ``after``,
+    and the id to continue from (``None`` on the last page).
+    """
+    books = Book.objects.filter(location=library_id).order_by('pk')
+    if after is not None:
+        books = books.filter(pk__gt=after)
+    results = list(books[:BOOKS_PER_PAGE + 1])
+    next_after = results[BOOKS_PER_PAGE - 1].pk if len(results) > BOOKS_PER_PAGE else None
+    return results[:BOOKS_PER_PAGE], next_after
+
+
+class LibraryView(LoginRequiredMixin, View):
+    def get(self, request):
+        all_libraries = Library.objects.all()
+        return render(request, 'library/library.html', {'all_libraries': all_libraries})
+
+
+class LibraryDetailView(LoginRequiredMixin, View):
+    def get(self, request, pk):
+        library = get_object_or_404(Library, pk=pk)
+        books = Book.objects.filter(location=pk)
+        return render(request, 'library/library_detail.html', {'library': library, 'books': books, })
+
+
+class BookDetailView(LoginRequiredMixin, View):
+    def get(self, request, pk):
+        book = get_object_or_404(Book.objects.select_related('location'), pk=pk)
+        borrowed_book = Borrowed.objects.filter(returned__isnull=True, book=book.id).select_related('borrowed_by').first()
+        library = book.location
+        edit_form = BookForm(instance=book)
+        return render(request, 'library/book_detail.html',
+                      {'book': book, 'library': library, 'edit_form': edit_form, 'borrowed_book': borrowed_book})
+
+
+class LibrarianDashboardView(LibrarianPermissionRequiredMixin, View):
+
+    def get(self, request):
+        library = request.user.library
+        lent = Borrowed.objects.filter(book__location=library, returned__isnull=True)\
+            .select_related('book', 'borrowed_by').order_by('-borrow_date', '-pk')[:LENT_BOOKS_SHOWN]
+        results, next_after = book_page(library.pk)
+        form = BookForm()
+        return render(request, 'library/dashboard.html',
+                      {'library': library, 'form': form, 'stats': dashboard_stats(library.pk),
+                       'lent': lent, 'results': results, 'next_after': next_after})
+
+    def post(self, request):
+        try:
+            after = int(request.POST.get('after', ''))
+        except ValueError:
+            after = None
+        results, next_after = book_page(request.user.library.pk, after)
+        return render(request, 'library/book_display.html', {'results': results, 'next_after': next_after})
+
+
+class AddBookView(LibrarianPermissionRequiredMixin, View):
+    def post(self, request):
+        book_form = BookForm(request.POST, request.FILES)
+        if book_form.is_valid():
+            if 'confirm' in request.POST:
+                new_book = Book(**book_form.cleaned_data, location=request.user.library, image_src=None)
+                new_book.save()
+                invalidate_dashboard_stats(new_book.location_id)
+            return redirect('dashboard')
+        else:
+            messages.error(request, 'Unable to add book.')
+            return redirect('dashboard')
+
+
+class DeleteBookView(LibrarianPermissionRequiredMixin, View):
+
+    def post(self, request, pk):
+        book = get_object_or_404(Book, pk=pk, location=request.user.library)
+        if 'confirm' in request.POST:
+            book.delete()
+            invalidate_dashboard_stats(book.location_id)
+            return redirect('dashboard')
+        return redirect('book_detail', pk=pk)
+
+
+class EditBookView(LibrarianPermissionRequiredMixin, View):
+    def post(self, request, pk):
+        book = get_object_or_404(Book, pk=pk, location=request.user.library)
+        book_form = BookForm(request.POST, request.FILES, instance=book)
+        if book_form.is_valid():
+            if 'confirm' in request.POST:
+                book.save()
+                invalidate_dashboard_stats(book.location_id)
+            return redirect('book_detail', pk=pk)
+        else:
+            messages.error(request, 'Unable to edit book.')
+            return redirect('book_detail', pk=pk)
+
+
+MAX_OPEN_LOANS = 3
+
+
+class BorrowBookView(LoginRequiredMixin, View):
+    def post(self, request, pk):
+        if 'confirm_borrow' in request.POST and self.borrow(request.user, pk):
+            messages.success(request, 'Book borrowed')
+        else:
+            messages.error(request, 'Unable to borrow book.')
+        return redirect('book_detail', pk=pk)
+
+    @staticmethod
+    def borrow(user, pk):
+        """
+        Lend book ``pk`` to ``user`` if it is available and the user has fewer
+        than ``MAX_OPEN_LOANS`` books. Safe under concurrent requests: the
+        book is claimed with a conditional UPDATE, so only one request can
+        flip ``available``, and the user's row is locked (where the database
+        supports it) so parallel borrows cannot exceed the loan limit.
+        """
+        borrow_date = datetime.date.today()
+        try:
+            with transaction.atomic():
+                if connection.features.has_select_for_update:
+                    list(User.objects.select_for_update().filter(pk=user.pk).values_list('pk'))
+                if not Book.objects.filter(pk=pk, available=True).update(available=False):
+                    return False
+                if Borrowed.objects.filter(borrowed_by=user, returned__isnull=True).count() >= MAX_OPEN_LOANS:
+                    transaction.set_rollback(True)
+                    return False
+                Borrowed.objects.create(borrowed_by=user, book_id=pk, borrow_date=borrow_date,
+                                        latest_return_date=borrow_date + datetime.timedelta(days=15))
+                # Read while the claimed row is ours; the book may be deleted once we commit.
+                library_id = Book.objects.values_list('location_id', flat=True).get(pk=pk)
+        except IntegrityError:
+            # The book already has an open loan (library_one_open_loan_per_book).
+            return False
+        invalidate_dashboard_stats(library_id)
+        return True
+
+
+class ReturnBookView(LoginRequiredMixin, View):
+    def post(self, request, pk):
+        if 'confirm_return' in request.POST and self.give_back(request.user, pk):
+            messages.success(request, 'Book returned')
+        else:
+            messages.error(request, 'Unable to return book.')
+        return redirect('book_detail', pk=pk)
+
+    @staticmethod
+    def give_back(user, pk):
+        """
+        Close ``user``'s open loan of book ``pk``. The loan is closed with one
+        conditional UPDATE, so a repeated or concurrent return is a no-op.
+        """
+        with transaction.atomic():
+            returned = Borrowed.objects.filter(borrowed_by=user, book_id=pk, returned__isnull=True)\
+                .update(returned=datetime.date.today())
+            if not returned:
+                return False
+            Book.objects.filter(pk=pk).update(available=True)
+            library_id = Book.objects.filter(pk=pk).values_list('location_id', flat=True).first()
+        if library_id is not None:
+            invalidate_dashboard_stats(library_id)
+        return True
+
+
+class AddBookFromGoogleView(LibrarianPermissionRequiredMixin, View):
+    def post(self, request, index):
+        book_data = request.session['book_data']
+        book = book_data[index - 1]
+        authors = ', '.join(book['volumeInfo']['authors'])
+        new_book = Book(title=book['volumeInfo']['title'], author=authors,
+                        image_src=book['volumeInfo']['imageLinks']['thumbnail'],
+                        isbn=book['volumeInfo']['industryIdentifiers'][0].get('identifier', None),
+                        info=book['volumeInfo'].get('description', None), location=request.user.library)
+        new_book.save()
+        invalidate_dashboard_stats(new_book.location_id)
+        return redirect('dashboard')
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class PerfConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'perf'
+
+    def ready(self):
+        from .tracing import enabled, instrument_templates
+        if enabled():
+            instrument_templates()
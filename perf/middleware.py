@@ -0,0 +1,55 @@
+import random
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import Resolver404, resolve
+from .tracing import enabled, start_trace, end_trace, span, recorder
+
+
+class PerfMiddleware:
+    """
+    Trace a ``PERF_SAMPLE_RATE`` fraction of requests: URL resolution,
+    middleware, the view, template renders, SQL queries and any ``span()``
+    the code opens. Put it first in ``MIDDLEWARE`` so the middleware time
+    covers everything after it. With a sample rate of 0 it removes itself.
+    """
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = settings.PERF_SAMPLE_RATE
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate or request.path_info.startswith('/_debug/'):
+            return self.get_response(request)
+
+        trace, token = start_trace(request.method, request.path)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(trace.record_query))
+                # Django resolves the URL again after the middleware; this times the lookup.
+                with span('urls.resolve'):
+                    try:
+                        resolve(request.path_info, getattr(request, 'urlconf', None))
+                    except Resolver404:
+                        pass
+                response = self.get_response(request)
+        finally:
+            end_trace(token)
+
+        end = perf_counter()
+        view_start = getattr(request, '_perf_view_start', None)
+        if view_start is not None:
+            trace.add_span('view', view_start, end)
+            trace.add_span('middleware', trace.start, view_start)
+        trace.finish(response.status_code)
+        recorder.record(trace)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._perf_view_start = perf_counter()
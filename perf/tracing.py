@@ -0,0 +1,183 @@
+"""Per-request spans and SQL fingerprints for sampled requests.
+
+A ``Trace`` lives in a context variable while ``PerfMiddleware`` handles a
+sampled request. Code outside a sampled request only pays for one context
+variable lookup in ``span()``.
+"""
+import heapq
+import json
+import re
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.utils import timezone
+
+_current_trace = ContextVar('perf_trace', default=None)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LIST_RE = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+
+
+def enabled():
+    return getattr(settings, 'PERF_SAMPLE_RATE', 0) > 0
+
+
+def fingerprint(sql):
+    """
+    Reduce ``sql`` to its shape so the same query with other values is
+    counted together.
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _LIST_RE.sub('(...)', sql)
+
+
+class Trace:
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.started = timezone.now()
+        self.start = perf_counter()
+        self.duration = None
+        self.status = None
+        self.spans = []
+        self.queries = {}
+
+    def add_span(self, name, start, end):
+        self.spans.append((name, (start - self.start) * 1000, (end - start) * 1000))
+
+    def record_query(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (perf_counter() - start) * 1000
+            stats = self.queries.setdefault(fingerprint(sql), [0, 0.0])
+            stats[0] += 1
+            stats[1] += duration
+            self.spans.append(('sql', (start - self.start) * 1000, duration))
+
+    def finish(self, status):
+        self.duration = (perf_counter() - self.start) * 1000
+        self.status = status
+
+    def as_dict(self):
+        return {
+            'started': self.started.isoformat(),
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'duration_ms': round(self.duration, 3),
+            'spans': [
+                {'name': name, 'offset_ms': round(offset, 3), 'duration_ms': round(duration, 3)}
+                for name, offset, duration in self.spans
+            ],
+            'queries': [
+                {'sql': sql, 'count': count, 'duration_ms': round(duration, 3)}
+                for sql, (count, duration) in sorted(self.queries.items(), key=lambda item: -item[1][1])
+            ],
+        }
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def start_trace(method, path):
+    trace = Trace(method, path)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+@contextmanager
+def span(name):
+    """
+    Record the time spent in the ``with`` block as ``name`` on the current
+    trace, if the request is being sampled.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, start, perf_counter())
+
+
+def instrument_templates():
+    """
+    Time every template render, including parents of ``{% extends %}`` and
+    ``{% include %}``d templates, which all go through ``Template._render``.
+    """
+    from django.template.base import Template
+
+    if getattr(Template._render, 'perf_instrumented', False):
+        return
+    render = Template._render
+
+    def _render(self, context):
+        trace = _current_trace.get()
+        if trace is None:
+            return render(self, context)
+        start = perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            trace.add_span(f'template {self.name}', start, perf_counter())
+
+    _render.perf_instrumented = True
+    Template._render = _render
+
+
+class Recorder:
+    """
+    Keep the slowest and the most recent sampled requests in memory and
+    append requests slower than ``PERF_SLOW_MS`` to ``PERF_LOG_FILE`` as
+    JSON lines.
+    """
+
+    def __init__(self, keep=50):
+        self.keep = keep
+        self.slowest = []
+        self.recent = deque(maxlen=keep)
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def record(self, trace):
+        data = trace.as_dict()
+        with self._lock:
+            self._counter += 1
+            self.recent.append(data)
+            entry = (trace.duration, self._counter, data)
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+
+        log_file = getattr(settings, 'PERF_LOG_FILE', None)
+        if log_file and trace.duration >= getattr(settings, 'PERF_SLOW_MS', 500):
+            line = json.dumps(data) + '\n'
+            with self._lock, open(log_file, 'a', encoding='utf-8') as log:
+                log.write(line)
+
+    def slowest_requests(self):
+        with self._lock:
+            return [data for _, _, data in sorted(self.slowest, reverse=True)]
+
+    def recent_requests(self):
+        with self._lock:
+            return list(reversed(self.recent))
+
+
+recorder = Recorder()
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+from django.views import View
+from .tracing import recorder
+
+
+class PerfView(View):
+    """
+    Show the slowest and the latest sampled requests. Only available to staff
+    users, or with ``DEBUG`` to requests from ``INTERNAL_IPS``.
+    """
+
+    def get(self, request):
+        local = settings.DEBUG and request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+        if not (local or request.user.is_staff):
+            raise Http404()
+        context = {
+            'slowest': recorder.slowest_requests(),
+            'recent': recorder.recent_requests(),
+            'sample_rate': getattr(settings, 'PERF_SAMPLE_RATE', 0),
+        }
+        if request.GET.get('format') == 'json':
+            return JsonResponse(context)
+        return render(request, 'perf/perf.html', context)
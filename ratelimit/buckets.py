@@ -0,0 +1,134 @@
+"""Rate limit counters kept in the Django cache.
+
+Each bucket is approximated with a sliding window over two fixed-window
+counters: the requests in the current period plus the previous period's
+requests weighted by how much of it still overlaps the window. A client can
+spend the whole capacity in a burst, after which it gets requests back
+steadily as the window slides, much like a token bucket refilled over
+``period``.
+
+Counters are only ever changed with the cache's atomic ``add``/``incr``/
+``decr``, so parallel requests sharing a backend such as Redis or memcached
+each see a distinct count and can't all slip through. One check is a
+``get_many`` plus one ``incr`` per key. When the cache backend fails the
+counters fall back to a per-process dict.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+
+
+def parse_rate(rate):
+    """
+    Turn ``'10/m'`` or ``'100/5m'`` into ``(capacity, period in seconds)``.
+    """
+    match = RATE_RE.match(rate)
+    if not match:
+        raise ValueError(f'Invalid rate {rate!r}, expected e.g. "10/m" or "100/5m".')
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * PERIODS[unit]
+
+
+def retry_after(previous, count, capacity, period, elapsed):
+    """
+    Seconds until a request that brought the window to ``count`` (with
+    ``previous`` requests in the last period, ``elapsed`` seconds into this
+    one) would fit in ``capacity`` again.
+    """
+    left = period - elapsed
+    excess = previous * left / period + count - capacity
+    if previous and excess * period / previous <= left:
+        return excess * period / previous
+    # In the next period the other requests of this one become the previous window.
+    excess = count - capacity
+    if excess <= 0:
+        return left
+    return left + excess * period / (count - 1)
+
+
+class LocalCounters:
+    """
+    Per-process stand-in for the cache, keeping at most ``max_entries`` counters.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        with self._lock:
+            return {key: self._counters[key] for key in keys if key in self._counters}
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if key in self._counters:
+                return False
+            self._counters[key] = value
+            while len(self._counters) > self.max_entries:
+                self._counters.popitem(last=False)
+            return True
+
+    def incr(self, key, delta=1):
+        with self._lock:
+            if key not in self._counters:
+                raise ValueError(f'Key {key!r} not found')
+            self._counters[key] += delta
+            self._counters.move_to_end(key)
+            return self._counters[key]
+
+    def decr(self, key, delta=1):
+        return self.incr(key, -delta)
+
+
+class RateCounters:
+
+    def __init__(self, cache_alias='default'):
+        self.cache_alias = cache_alias
+        self.local = LocalCounters()
+
+    def take(self, keys, capacity, period):
+        """
+        Count one request against every bucket in ``keys``. Return 0 when
+        allowed, otherwise the number of seconds until the request would be
+        allowed; nothing is counted then.
+        """
+        try:
+            return self._take(caches[self.cache_alias], keys, capacity, period)
+        except Exception:
+            return self._take(self.local, keys, capacity, period)
+
+    @staticmethod
+    def _hit(store, key, timeout):
+        try:
+            return store.incr(key)
+        except ValueError:
+            if store.add(key, 1, timeout):
+                return 1
+            return store.incr(key)
+
+    def _take(self, store, keys, capacity, period):
+        now = time.time()
+        window = int(now // period)
+        elapsed = now - window * period
+        current = [f'{key}:{window}' for key in keys]
+        previous = store.get_many([f'{key}:{window - 1}' for key in keys])
+
+        wait = 0
+        for key, current_key in zip(keys, current):
+            count = self._hit(store, current_key, 2 * period)
+            prev = previous.get(f'{key}:{window - 1}', 0)
+            if prev * (period - elapsed) / period + count > capacity:
+                wait = max(wait, retry_after(prev, count, capacity, period, elapsed))
+
+        if wait:
+            # Give the request back, so being throttled doesn't extend the wait.
+            for current_key in current:
+                store.decr(current_key)
+        return wait
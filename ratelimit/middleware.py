@@ -0,0 +1,49 @@
+import math
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from .buckets import RateCounters, parse_rate
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class RateLimitMiddleware:
+    """
+    Throttle writes to the URL names in ``RATELIMITS`` (e.g.
+    ``{'login': '10/m'}``) with one bucket per user and one per client IP,
+    counted in the ``RATELIMIT_CACHE`` cache (see ``ratelimit.buckets``). Over the limit the client
+    gets a 429 with a ``Retry-After`` header. Must come after
+    ``AuthenticationMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        limits = getattr(settings, 'RATELIMITS', {})
+        if not limits:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.limits = {name: parse_rate(rate) for name, rate in limits.items()}
+        self.buckets = RateCounters(getattr(settings, 'RATELIMIT_CACHE', 'default'))
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS:
+            return None
+        url_name = request.resolver_match.url_name
+        limit = self.limits.get(url_name)
+        if limit is None:
+            return None
+
+        keys = [f'ratelimit:{url_name}:ip:{request.META.get("REMOTE_ADDR", "")}']
+        if request.user.is_authenticated:
+            keys.append(f'ratelimit:{url_name}:user:{request.user.pk}')
+
+        wait = self.buckets.take(keys, *limit)
+        if wait:
+            response = HttpResponse('Too many requests, please try again later.', status=429,
+                                    content_type='text/plain')
+            response.headers['Retry-After'] = str(math.ceil(wait))
+            return response
+        return None
@@ -0,0 +1,112 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from .buckets import RateCounters, parse_rate
+
+NOW = 1_000_000 * 60.0  # The start of a minute.
+
+
+class FakeClock:
+
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@override_settings(RATELIMITS={'register': '3/m'}, RATELIMIT_CACHE='ratelimit')
+class RateLimitMiddlewareTests(TestCase):
+
+    def setUp(self):
+        caches['ratelimit'].clear()
+        self.clock = FakeClock()
+        patcher = mock.patch('ratelimit.buckets.time.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def register(self, ip='10.0.0.1'):
+        return self.client.post(reverse('register'), {}, REMOTE_ADDR=ip)
+
+    def test_burst_then_429_with_retry_after(self):
+        for _ in range(3):
+            self.assertEqual(self.register().status_code, 200)
+        response = self.register()
+        self.assertEqual(response.status_code, 429)
+        # The burst fills the window; the next one starts with it at full weight.
+        self.assertEqual(response.headers['Retry-After'], '80')
+
+    def test_requests_come_back_as_the_window_slides(self):
+        for _ in range(3):
+            self.register()
+        self.clock.now += 60
+        # A minute later the previous window still fills the whole limit.
+        response = self.register()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '20')
+
+        self.clock.now += 20
+        self.assertEqual(self.register().status_code, 200)
+        self.assertEqual(self.register().status_code, 429)
+
+    def test_throttled_requests_are_not_counted(self):
+        for _ in range(10):
+            self.register()
+        self.clock.now += 60 + 20
+        self.assertEqual(self.register().status_code, 200)
+
+    def test_limits_are_per_client_ip(self):
+        for _ in range(3):
+            self.register()
+        self.assertEqual(self.register().status_code, 429)
+        self.assertEqual(self.register(ip='10.0.0.2').status_code, 200)
+
+    def test_reads_are_not_limited(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get(reverse('register')).status_code, 200)
+
+    def test_other_cache_entries_do_not_evict_the_counters(self):
+        for _ in range(3):
+            self.register()
+        cache.set_many({f'junk:{i}': i for i in range(1000)})
+        self.assertEqual(self.register().status_code, 429)
+
+
+class RateCountersTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['ratelimit'].clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('100/5m'), (100, 300))
+        with self.assertRaises(ValueError):
+            parse_rate('10 per minute')
+
+    def test_parallel_requests_cannot_exceed_the_capacity(self):
+        counters = RateCounters('ratelimit')
+        barrier = threading.Barrier(50)
+        allowed = []
+
+        def worker():
+            barrier.wait()
+            allowed.append(counters.take(['ratelimit:test'], 10, 60) == 0)
+
+        with mock.patch('ratelimit.buckets.time.time', FakeClock()):
+            threads = [threading.Thread(target=worker) for _ in range(50)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(allowed.count(True), 10)
+
+    def test_falls_back_to_local_counters_when_the_cache_fails(self):
+        counters = RateCounters('ratelimit')
+        with mock.patch('ratelimit.buckets.time.time', FakeClock()), \
+                mock.patch.object(caches['ratelimit'], 'get_many', side_effect=ConnectionError):
+            results = [counters.take(['ratelimit:test'], 2, 60) for _ in range(3)]
+        self.assertEqual(results[:2], [0, 0])
+        self.assertGreater(results[2], 0)
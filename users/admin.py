@@ -1,7 +1,16 @@
 from django.contrib import admin
+from blog.mixins import IndexedSearchMixin
+from blog.paginators import EstimatedCountPaginator
 from .models import Profile
 
-admin.site.register(Profile)
 
+class ProfileAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('user', 'image')
+    list_select_related = ('user',)
+    search_fields = ('^user__username',)
+    raw_id_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
+admin.site.register(Profile, ProfileAdmin)
@@ -0,0 +1,86 @@
+"""Local blocklist of disposable email domains.
+
+The domains are kept in a frozenset and looked up by suffix, so
+``x.mailinator.com`` is blocked by a ``mailinator.com`` entry. The list file
+is checked for changes at most every ``check_interval`` seconds and reloaded
+in place, so it can be updated without restarting the server.
+
+The ``DISPOSABLE_EMAIL_DOMAINS_FILE`` and ``DISPOSABLE_EMAIL_BLOCKLIST``
+settings are read when the blocklist is first used and again whenever they
+change through ``setting_changed`` (e.g. ``override_settings`` in tests).
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+DEFAULT_DOMAINS_FILE = os.path.join(os.path.dirname(__file__), 'disposable_domains.txt')
+
+
+def read_domains(path):
+    with open(path, encoding='utf-8') as domains:
+        return frozenset(
+            line.strip().lower().rstrip('.') for line in domains
+            if line.strip() and not line.lstrip().startswith('#')
+        )
+
+
+class DomainBlocklist:
+
+    def __init__(self, path, extra_domains=(), check_interval=5):
+        self.path = path
+        self.extra_domains = frozenset(domain.lower() for domain in extra_domains)
+        self.check_interval = check_interval
+        self.domains = self.extra_domains
+        self._mtime = None
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return
+            if mtime != self._mtime:
+                self.domains = read_domains(self.path) | self.extra_domains
+                self._mtime = mtime
+
+    def is_blocked(self, domain):
+        self._reload_if_changed()
+        labels = domain.lower().rstrip('.').split('.')
+        domains = self.domains
+        return any('.'.join(labels[i:]) in domains for i in range(len(labels) - 1))
+
+
+_blocklist = None
+
+
+def get_blocklist():
+    global _blocklist
+    if _blocklist is None:
+        _blocklist = DomainBlocklist(
+            getattr(settings, 'DISPOSABLE_EMAIL_DOMAINS_FILE', DEFAULT_DOMAINS_FILE),
+            getattr(settings, 'DISPOSABLE_EMAIL_BLOCKLIST', ()),
+        )
+    return _blocklist
+
+
+@receiver(setting_changed)
+def reset_blocklist(setting, **kwargs):
+    global _blocklist
+    if setting in ('DISPOSABLE_EMAIL_DOMAINS_FILE', 'DISPOSABLE_EMAIL_BLOCKLIST'):
+        _blocklist = None
+
+
+def is_disposable_email(email):
+    return get_blocklist().is_blocked(email.rpartition('@')[2])
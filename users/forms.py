@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
+from .disposable import is_disposable_email
 from .models import Profile
 
 
@@ -11,6 +12,12 @@ class UserRegisterForm(UserCreationForm):
         model = User
         fields = ['username', 'email', 'password1', 'password2']
 
+    def clean_email(self):
+        email = self.cleaned_data['email']
+        if is_disposable_email(email):
+            raise forms.ValidationError('Please register with a permanent email address.')
+        return email
+
 
 class UserUpdateForm(forms.ModelForm):
     email = forms.EmailField()
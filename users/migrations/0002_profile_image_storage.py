@@ -0,0 +1,19 @@
+# Generated by Django 4.0.6 on 2026-10-19 12:19
+
+from django.db import migrations, models
+import users.uploads
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='image',
+            field=models.ImageField(default='default.jpg', storage=users.uploads.ContentAddressedStorage(), upload_to='profile_pics'),
+        ),
+    ]
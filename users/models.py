@@ -1,21 +1,45 @@
+from io import BytesIO
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
 from PIL import Image
+from perf.tracing import span
+from .uploads import ContentAddressedStorage, file_digest
 
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
-    image = models.ImageField(default='default.jpg', upload_to='profile_pics')
+    image = models.ImageField(default='default.jpg', upload_to='profile_pics', storage=ContentAddressedStorage())
 
     def __str__(self):
         return f'{self.user.username} Profile'
 
     def save(self, *args, **kwargs):
+        # Resize a new upload before it is stored instead of re-opening it from disk afterwards.
+        # Saves that don't change the image (e.g. from the User post_save signal) never touch the file.
+        if self.image and not self.image._committed:
+            self.image = self.thumbnail(self.image)
+
         super().save(*args, **kwargs)
 
-        img = Image.open(self.image.path)
+    @staticmethod
+    def thumbnail(image, output_size=(300, 300)):
+        with span('profile.thumbnail'):
+            image.seek(0)
+            img = Image.open(image)
+
+            if img.height <= output_size[1] and img.width <= output_size[0]:
+                image.seek(0)
+                return image
 
-        if img.height > 300 or img.width > 300:
-            output_size = (300, 300)
+            # Storage is keyed on the digest of what was uploaded, so the same upload
+            # maps to the same file and the handler's digest isn't recomputed.
+            digest = getattr(image.file, 'content_hash', None) or file_digest(image)
+            img_format = img.format
             img.thumbnail(output_size)
-            img.save(self.image.path)
+            buffer = BytesIO()
+            img.save(buffer, format=img_format)
+            resized = ContentFile(buffer.getvalue(), name=image.name)
+            resized.content_hash = digest
+            return resized
@@ -1,3 +1,196 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from . import uploads
+from .disposable import DomainBlocklist, is_disposable_email
+from .forms import UserRegisterForm
+from .models import Profile
+
+
+def png(size=(10, 10), color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class UploadTestCase(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        overrides = override_settings(MEDIA_ROOT=self.media_root, FILE_UPLOAD_TEMP_DIR=self.temp_dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # The storage instance is created at import time with the MEDIA_ROOT of then.
+        storage = uploads.ContentAddressedStorage(location=self.media_root)
+        patcher = mock.patch.object(Profile._meta.get_field('image'), 'storage', storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user('alice', 'alice@example.com')
+        self.client.force_login(self.user)
+
+
+class ProfileImageUploadTests(UploadTestCase):
+
+    def upload(self, content, name='me.png'):
+        return self.client.post(reverse('profile'), {
+            'username': self.user.username,
+            'email': self.user.email,
+            'image': SimpleUploadedFile(name, content),
+        })
+
+    def image_name(self, user=None):
+        user = user or self.user
+        user.profile.refresh_from_db()
+        return user.profile.image.name
+
+    def test_rejects_files_that_are_not_images(self):
+        response = self.upload(b'#!/bin/sh\necho not an image\n', name='me.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Upload a valid JPEG, PNG, GIF or WebP image.')
+        self.assertEqual(self.image_name(), 'default.jpg')
+
+    @override_settings(PROFILE_IMAGE_MAX_SIZE=1024)
+    def test_rejects_files_over_the_size_limit(self):
+        content = png(size=(200, 200), color=None) + b'\0' * 2048
+        response = self.upload(content)
+        self.assertContains(response, 'The image can be at most')
+        self.assertEqual(self.image_name(), 'default.jpg')
+
+    def test_identical_uploads_share_one_file(self):
+        content = png(size=(600, 400))
+        self.assertRedirects(self.upload(content), reverse('profile'))
+        bob = User.objects.create_user('bob', 'bob@example.com')
+        self.client.force_login(bob)
+        self.user = bob
+        self.assertRedirects(self.upload(content, name='other.png'), reverse('profile'))
+
+        name = self.image_name(bob)
+        self.assertEqual(name, self.image_name(User.objects.get(username='alice')))
+        self.assertTrue(name.startswith('profile_pics/'))
+        with Image.open(os.path.join(self.media_root, name)) as image:
+            self.assertEqual(image.size, (300, 200))
+
+    def test_resized_image_is_stored_under_the_upload_digest(self):
+        content = png(size=(600, 400))
+        with mock.patch('users.uploads.file_digest') as storage_digest, \
+                mock.patch('users.models.file_digest') as thumbnail_digest:
+            self.upload(content)
+        storage_digest.assert_not_called()
+        thumbnail_digest.assert_not_called()
+        digest = uploads.hashlib.sha256(content).hexdigest()
+        self.assertEqual(self.image_name(), f'profile_pics/{digest[:2]}/{digest}.png')
+
+
+class ChunkedUploadTests(UploadTestCase):
+
+    def send(self, content, start, total, upload_id='abc'):
+        return self.client.post(
+            reverse('profile-image-upload'), content, content_type='application/octet-stream',
+            HTTP_X_UPLOAD_ID=upload_id, HTTP_X_FILE_NAME='me.png',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(content) - 1}/{total}',
+        )
+
+    def test_resume_after_an_interrupted_upload(self):
+        content = png(size=(50, 50))
+        self.assertEqual(self.send(content[:40], 0, len(content)).json(), {'received': 40})
+
+        response = self.client.get(reverse('profile-image-upload') + '?upload_id=abc')
+        self.assertEqual(response.json(), {'received': 40})
+
+        # A chunk that doesn't continue where the stored bytes end is refused.
+        response = self.send(content[60:], 60, len(content))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'received': 40})
+
+        response = self.send(content[40:], 40, len(content))
+        self.assertEqual(response.status_code, 200)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(response.json()['image'], self.user.profile.image.url)
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_header_split_over_small_chunks(self):
+        content = png()
+        for start in range(0, 15, 5):
+            self.assertEqual(self.send(content[start:start + 5], start, len(content)).status_code, 200)
+        self.assertEqual(self.send(content[15:], 15, len(content)).status_code, 200)
+        self.user.profile.refresh_from_db()
+        self.assertNotEqual(self.user.profile.image.name, 'default.jpg')
+
+    def test_rejects_a_bad_header_once_it_is_complete(self):
+        content = b'GIF00a' + b'\0' * 100
+        self.assertEqual(self.send(content[:5], 0, len(content)).status_code, 200)
+        response = self.send(content[5:20], 5, len(content))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    @override_settings(PROFILE_IMAGE_MAX_SIZE=1024)
+    def test_rejects_uploads_over_the_size_limit(self):
+        self.assertEqual(self.send(png()[:10], 0, 2048).status_code, 413)
+
+    def test_one_upload_in_progress_per_user(self):
+        content = png()
+        self.send(content[:20], 0, len(content), upload_id='first')
+        self.send(content[:20], 0, len(content), upload_id='second')
+        self.assertEqual(os.listdir(self.temp_dir), [f'profile-{self.user.pk}-second.part'])
+
+
+class DisposableEmailTests(SimpleTestCase):
+
+    def test_subdomains_of_listed_domains_are_blocked(self):
+        self.assertTrue(is_disposable_email('someone@mailinator.com'))
+        self.assertTrue(is_disposable_email('someone@x.Mailinator.com'))
+        self.assertTrue(is_disposable_email('someone@a.b.mailinator.com.'))
+        self.assertFalse(is_disposable_email('someone@notmailinator.com'))
+        self.assertFalse(is_disposable_email('someone@mailinator.com.example.org'))
+        self.assertFalse(is_disposable_email('someone@example.com'))
+
+    def test_list_file_is_reloaded_when_it_changes(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as domains:
+            domains.write('# comment\nthrowaway.test\n')
+        self.addCleanup(os.remove, domains.name)
+        blocklist = DomainBlocklist(domains.name, check_interval=0)
+        self.assertTrue(blocklist.is_blocked('throwaway.test'))
+        self.assertFalse(blocklist.is_blocked('burner.test'))
+
+        with open(domains.name, 'w') as changed:
+            changed.write('burner.test\n')
+        stat = os.stat(domains.name)
+        os.utime(domains.name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertTrue(blocklist.is_blocked('burner.test'))
+        self.assertFalse(blocklist.is_blocked('throwaway.test'))
+
+    def test_extra_domains_setting_is_read_when_it_changes(self):
+        self.assertFalse(is_disposable_email('someone@example.com'))
+        with override_settings(DISPOSABLE_EMAIL_BLOCKLIST=['Example.com']):
+            self.assertTrue(is_disposable_email('someone@mail.example.com'))
+            self.assertTrue(is_disposable_email('someone@mailinator.com'))
+        self.assertFalse(is_disposable_email('someone@example.com'))
+
+
+class RegisterFormTests(TestCase):
+
+    def form(self, email):
+        return UserRegisterForm({
+            'username': 'newuser', 'email': email,
+            'password1': 'a-long-Passw0rd', 'password2': 'a-long-Passw0rd',
+        })
+
+    def test_disposable_email_is_rejected(self):
+        form = self.form('me@sub.mailinator.com')
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['email'], ['Please register with a permanent email address.'])
+
+    def test_permanent_email_is_accepted(self):
+        self.assertTrue(self.form('me@example.com').is_valid())
@@ -0,0 +1,99 @@
+"""Streaming upload handling and storage for profile images."""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from django.utils.deconstruct import deconstructible
+
+DEFAULT_PROFILE_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_HEADER_SIZE = 12
+
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',  # JPEG
+    b'\x89PNG\r\n\x1a\n',  # PNG
+    b'GIF87a',
+    b'GIF89a',
+)
+
+
+def profile_image_max_size():
+    return getattr(settings, 'PROFILE_IMAGE_MAX_SIZE', DEFAULT_PROFILE_IMAGE_MAX_SIZE)
+
+
+def looks_like_image(header):
+    """
+    Check the first ``IMAGE_HEADER_SIZE`` bytes of a file against the image
+    formats we accept.
+    """
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return True
+    return header.startswith(IMAGE_SIGNATURES)
+
+
+def file_digest(content):
+    sha256 = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    content.seek(0)
+    return sha256.hexdigest()
+
+
+class ProfileImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream the profile image to a temporary file while hashing it, enforcing
+    ``PROFILE_IMAGE_MAX_SIZE`` and checking the image header on the first
+    chunk. Rejected files are skipped and the reason is kept in ``errors``.
+    """
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = profile_image_max_size()
+        self.errors = []
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.header = b''
+
+    def receive_data_chunk(self, raw_data, start):
+        if len(self.header) < IMAGE_HEADER_SIZE:
+            self.header += raw_data[:IMAGE_HEADER_SIZE - len(self.header)]
+            if len(self.header) >= IMAGE_HEADER_SIZE and not looks_like_image(self.header):
+                self.errors.append('Upload a valid JPEG, PNG, GIF or WebP image.')
+                raise SkipFile()
+        if start + len(raw_data) > self.max_size:
+            self.errors.append(f'The image can be at most {self.max_size // (1024 * 1024)} MB.')
+            raise SkipFile()
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if not looks_like_image(self.header):
+            self.errors.append('Upload a valid JPEG, PNG, GIF or WebP image.')
+            self.file.close()
+            return None
+        uploaded = super().file_complete(file_size)
+        uploaded.content_hash = self.sha256.hexdigest()
+        return uploaded
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Store every file under the SHA-256 of the uploaded content, so identical
+    uploads share one file on disk. ``_save`` uses the ``content_hash`` of the
+    file when it has one: the digest ``ProfileImageUploadHandler`` computed
+    as the bytes arrived, which ``Profile.thumbnail`` carries over to the
+    resized image.
+    """
+
+    def _save(self, name, content):
+        digest = getattr(content, 'content_hash', None) or file_digest(content)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest[:2], digest + extension)
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
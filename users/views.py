@@ -1,9 +1,21 @@
+import glob
+import os
+import re
+import tempfile
+import time
+
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.views import View
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.files.uploadedfile import UploadedFile
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from .forms import UserRegisterForm, UserUpdateForm, ProfileUpdateForm
 from django.contrib.auth.decorators import login_required
+from .uploads import IMAGE_HEADER_SIZE, ProfileImageUploadHandler, looks_like_image, profile_image_max_size
 
 
 class Register(View):
@@ -28,10 +40,22 @@ class Register(View):
 
 
 @login_required
-def profile(request):  # TODO: Make this a class view!
+@csrf_exempt
+def profile(request):
+    # The upload handler has to be in place before anything reads request.POST,
+    # so CSRF is checked in _profile() instead of by the middleware.
+    upload_handler = ProfileImageUploadHandler(request)
+    request.upload_handlers = [upload_handler]
+    return _profile(request, upload_handler)
+
+
+@csrf_protect
+def _profile(request, upload_handler):  # TODO: Make this a class view!
     if request.method == 'POST':
         u_form = UserUpdateForm(request.POST, instance=request.user)
         p_form = ProfileUpdateForm(request.POST, request.FILES, instance=request.user.profile)
+        for error in upload_handler.errors:
+            p_form.add_error('image', error)
         if u_form.is_valid() and p_form.is_valid():
             u_form.save()
             p_form.save()
@@ -50,3 +74,118 @@ def profile(request):  # TODO: Make this a class view!
     return render(request, 'users/profile.html', context)
 
 
+class ProfileImageChunkUploadView(LoginRequiredMixin, View):
+    """
+    Resumable, chunked upload of the profile image.
+
+    Every POST sends raw bytes with a ``Content-Range: bytes <start>-<end>/<total>``
+    header and a client chosen ``X-Upload-Id``. A GET with ``?upload_id=`` tells
+    the client how many bytes are already stored, so it can resume from there.
+
+    A user has at most one upload in progress: starting a new one discards the
+    others. Partial files untouched for ``expire_after`` seconds are removed.
+    """
+    chunk_size = 64 * 2 ** 10
+    expire_after = 24 * 60 * 60
+    upload_id_re = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+    content_range_re = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+    @staticmethod
+    def partial_dir():
+        return settings.FILE_UPLOAD_TEMP_DIR or tempfile.gettempdir()
+
+    def partial_path(self, upload_id):
+        return os.path.join(self.partial_dir(), f'profile-{self.request.user.pk}-{upload_id}.part')
+
+    def received(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return 0
+        if stat.st_mtime < time.time() - self.expire_after:
+            self.remove(path)
+            return 0
+        return stat.st_size
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def discard_other_uploads(self, path):
+        """
+        Remove the user's other partial uploads and everyone's expired ones.
+        """
+        expired = time.time() - self.expire_after
+        own = self.partial_path('')[:-len('.part')]
+        for other in glob.glob(os.path.join(self.partial_dir(), 'profile-*-*.part')):
+            if other == path:
+                continue
+            try:
+                stale = os.path.getmtime(other) < expired
+            except FileNotFoundError:
+                continue
+            if stale or other.startswith(own):
+                self.remove(other)
+
+    def get(self, request):
+        upload_id = request.GET.get('upload_id', '')
+        if not self.upload_id_re.match(upload_id):
+            return JsonResponse({'error': 'Invalid upload id.'}, status=400)
+        return JsonResponse({'received': self.received(self.partial_path(upload_id))})
+
+    def post(self, request):
+        upload_id = request.headers.get('X-Upload-Id', '')
+        content_range = self.content_range_re.match(request.headers.get('Content-Range', ''))
+        if not self.upload_id_re.match(upload_id) or not content_range:
+            return JsonResponse({'error': 'X-Upload-Id and Content-Range headers are required.'}, status=400)
+
+        start, end, total = map(int, content_range.groups())
+        if not start <= end < total:
+            return JsonResponse({'error': 'Invalid Content-Range.'}, status=400)
+        if total > profile_image_max_size():
+            return JsonResponse({'error': 'The image is too large.'}, status=413)
+
+        path = self.partial_path(upload_id)
+        received = self.received(path)
+        if start != received:
+            return JsonResponse({'received': received}, status=409)
+        if start == 0:
+            self.discard_other_uploads(path)
+
+        remaining = end - start + 1
+        with open(path, 'ab') as partial:
+            while remaining:
+                chunk = request.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                partial.write(chunk)
+                remaining -= len(chunk)
+            received = partial.tell()
+
+        # The header may arrive over several chunks; check it once it is complete.
+        if start < IMAGE_HEADER_SIZE and (received >= IMAGE_HEADER_SIZE or received == total):
+            with open(path, 'rb') as partial:
+                header = partial.read(IMAGE_HEADER_SIZE)
+            if not looks_like_image(header):
+                os.remove(path)
+                return JsonResponse({'error': 'Upload a valid JPEG, PNG, GIF or WebP image.'}, status=400)
+
+        if received < total:
+            return JsonResponse({'received': received})
+        return self.complete(request, path)
+
+    def complete(self, request, path):
+        name = os.path.basename(request.headers.get('X-File-Name', '')) or 'profile.jpg'
+        try:
+            with open(path, 'rb') as image:
+                upload = UploadedFile(image, name=name, size=os.path.getsize(path))
+                p_form = ProfileUpdateForm(files={'image': upload}, instance=request.user.profile)
+                if not p_form.is_valid():
+                    return JsonResponse({'errors': p_form.errors}, status=400)
+                profile = p_form.save()
+        finally:
+            os.remove(path)
+        return JsonResponse({'received': upload.size, 'image': profile.image.url})